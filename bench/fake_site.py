@@ -0,0 +1,171 @@
+"""
+Local HTTP stand-in for a competitor site, for offline benchmarks.
+
+    python bench/fake_site.py --articles 500 --latency 0.02 --port 8765
+
+Serves:
+- /robots.txt                 -> Sitemap: /sitemap_index.xml
+- /sitemap_index.xml          -> gzipped sub-sitemaps + one nested index
+- /sitemaps/posts-<k>.xml.gz  -> urlset pages (SITEMAP_PAGE URLs each, with lastmod)
+- /es/novedades/?page=<k>     -> paginated list pages (relative + absolute links, rel=next)
+- /es/novedades/post-<i>/     -> article pages (title, article:published_time, body)
+Every response waits `latency` seconds; ETag / If-None-Match are honored.
+"""
+import gzip
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from synth import load_vocabulary, make_text
+
+SITEMAP_PAGE = 1000
+LIST_PAGE = 20
+
+class FakeSite:
+    def __init__(self, articles: int = 200, latency: float = 0.0, seed: int = 0):
+        self.articles = articles
+        self.latency = latency
+        self.seed = seed
+        self.vocab = load_vocabulary()
+        self.base_url = ""
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def lastmod(self, i: int) -> str:
+        return (date(2024, 1, 1) + timedelta(days=i % 1000)).isoformat()
+
+    def article(self, i: int) -> bytes:
+        rng = random.Random(self.seed * 1_000_003 + i)
+        paras = "".join(f"<p>{make_text(rng, self.vocab, rng.randint(60, 140))}</p>" for _ in range(rng.randint(3, 8)))
+        html = (
+            f"<html><head><title>Post {i} | Fake</title>"
+            f"<meta property=\"article:published_time\" content=\"{self.lastmod(i)}T09:00:00+00:00\"></head>"
+            f"<body><nav><a href=\"/\">Inicio</a><a href=\"/es/novedades/\">Novedades</a></nav>"
+            f"<article><h1>Post {i}</h1>{paras}</article>"
+            f"<footer>© Fake consulting — aviso legal — cookies</footer></body></html>"
+        )
+        return html.encode("utf-8")
+
+    def list_page(self, page: int) -> bytes:
+        first = (page - 1) * LIST_PAGE
+        links = []
+        for i in range(first, min(first + LIST_PAGE, self.articles)):
+            # alternate absolute, root-relative and document-relative hrefs
+            href = [f"{self.base_url}/es/novedades/post-{i}/", f"/es/novedades/post-{i}/", f"post-{i}/"][i % 3]
+            links.append(f"<li><a href=\"{href}\">Post {i}</a></li>")
+        nxt = ""
+        if first + LIST_PAGE < self.articles:
+            nxt = f"<a rel=\"next\" class=\"next\" href=\"?page={page + 1}\">Siguiente</a>"
+        html = (
+            "<html><head><title>Novedades</title></head><body>"
+            "<nav><a href=\"/\">Inicio</a><a href=\"/es/contacto/\">Contacto</a></nav>"
+            f"<ul>{''.join(links)}</ul>{nxt}</body></html>"
+        )
+        return html.encode("utf-8")
+
+    def sitemap_index(self) -> bytes:
+        n_pages = max(1, -(-self.articles // SITEMAP_PAGE))
+        entries = "".join(
+            f"<sitemap><loc>{self.base_url}/sitemaps/posts-{k}.xml.gz</loc><lastmod>{self.lastmod(k * SITEMAP_PAGE)}</lastmod></sitemap>"
+            for k in range(1, n_pages)
+        )
+        entries += f"<sitemap><loc>{self.base_url}/sitemaps/nested.xml</loc></sitemap>"
+        return ("<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+                "<sitemapindex xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">"
+                f"{entries}</sitemapindex>").encode("utf-8")
+
+    def nested_index(self) -> bytes:
+        # the first page is only reachable through a second level of index
+        return ("<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+                "<sitemapindex xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">"
+                f"<sitemap><loc>{self.base_url}/sitemaps/posts-0.xml.gz</loc></sitemap>"
+                "</sitemapindex>").encode("utf-8")
+
+    def sitemap_page(self, k: int) -> bytes:
+        urls = "".join(
+            f"<url><loc>{self.base_url}/es/novedades/post-{i}/</loc><lastmod>{self.lastmod(i)}</lastmod></url>"
+            for i in range(k * SITEMAP_PAGE, min((k + 1) * SITEMAP_PAGE, self.articles))
+        )
+        xml = ("<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+               "<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">"
+               f"{urls}</urlset>")
+        return gzip.compress(xml.encode("utf-8"), mtime=0)
+
+    def route(self, path: str, query: dict) -> tuple[int, str, bytes]:
+        if path == "/robots.txt":
+            return 200, "text/plain", f"User-agent: *\nSitemap: {self.base_url}/sitemap_index.xml\n".encode()
+        if path == "/sitemap_index.xml":
+            return 200, "application/xml", self.sitemap_index()
+        if path == "/sitemaps/nested.xml":
+            return 200, "application/xml", self.nested_index()
+        if path.startswith("/sitemaps/posts-") and path.endswith(".xml.gz"):
+            k = int(path[len("/sitemaps/posts-"):-len(".xml.gz")])
+            return 200, "application/gzip", self.sitemap_page(k)
+        if path == "/es/novedades/":
+            return 200, "text/html; charset=utf-8", self.list_page(int(query.get("page", ["1"])[0]))
+        if path.startswith("/es/novedades/post-"):
+            i = int(path.strip("/").rsplit("-", 1)[1])
+            if i < self.articles:
+                return 200, "text/html; charset=utf-8", self.article(i)
+        return 404, "text/plain", b"not found"
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                parts = urlsplit(self.path)
+                status, ctype, body = site.route(parts.path, parse_qs(parts.query))
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self, port: int = 0) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake competitor site")
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    site = FakeSite(args.articles, args.latency)
+    server = site.start(args.port)
+    print(f"Serving {args.articles} articles on {site.base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
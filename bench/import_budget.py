@@ -0,0 +1,77 @@
+"""
+Cold-start budget of each entry point: which heavy packages importing the
+module drags in, and how long the import takes over a bare interpreter.
+
+    python bench/import_budget.py            # exit code 1 if a budget is blown
+    python bench/import_budget.py --scale 2  # slower machine: budgets × 2
+
+A step only pays for what it uses: heavy packages are imported inside the
+functions that need them (fetch_sources.load_extractor, the pipeline runners).
+"""
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+
+HEAVY = {"pandas", "numpy", "bs4", "lxml", "trafilatura", "requests"}
+
+# module -> (import budget in ms over a bare interpreter, packages it must not import)
+BUDGETS = {
+    "metrics": (50, HEAVY),
+    "pipeline": (80, HEAVY),
+    "weekly_posts": (80, HEAVY),
+    "send_email": (80, HEAVY),
+    "send_email_graph": (80, HEAVY),
+    "fetch_sources": (300, HEAVY - {"requests"}),
+    "analyze": (1000, {"bs4", "lxml", "trafilatura", "requests"}),
+}
+
+def python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True)
+
+def wall_ms(code: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = python(code)
+        samples.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr)
+    return statistics.median(samples)
+
+def heavy_imports(module: str, forbidden: set) -> list[str]:
+    proc = python(f"import sys, {module}; print('\\n'.join(sys.modules))")
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    top = {name.split(".")[0] for name in proc.stdout.split()}
+    return sorted(top & forbidden)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import-time budget of each entry point")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per module (median)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every time budget")
+    args = parser.parse_args(argv)
+
+    base = wall_ms("pass", args.repeat)
+    failures = 0
+    for module, (budget, forbidden) in BUDGETS.items():
+        ms = wall_ms(f"import {module}", args.repeat) - base
+        heavy = heavy_imports(module, forbidden)
+        limit = budget * args.scale
+        ok = ms <= limit and not heavy
+        failures += not ok
+        extra = f"  imports {', '.join(heavy)}" if heavy else ""
+        print(f"{'ok  ' if ok else 'FAIL'} {module:18s} {ms:7.1f} ms  (budget {limit:.0f} ms){extra}")
+    print(f"(bare interpreter: {base:.1f} ms)")
+    if failures:
+        print(f"{failures} entry point(s) over budget — python -X importtime -c 'import <module>' shows why")
+        sys.exit(1)
+    print("OK — All entry points within their import budget")
+
+if __name__ == "__main__":
+    main()
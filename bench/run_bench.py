@@ -0,0 +1,251 @@
+"""
+Offline benchmarks for fetch_sources.py and analyze.py.
+
+    python bench/run_bench.py                 # 1k + 100k corpus
+    python bench/run_bench.py --sizes 1k,100k,1m --articles 500
+
+Everything runs against local data (bench/synth.py) and a local HTTP
+stand-in (bench/fake_site.py). Results go to bench/results/<timestamp>.json
+and are compared with the previous results file.
+"""
+import os
+import re
+import csv
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+
+import yaml
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+SRC = ROOT / "src"
+RESULTS_DIR = BENCH_DIR / "results"
+sys.path.insert(0, str(SRC))
+sys.path.insert(0, str(BENCH_DIR))
+
+import synth
+from fake_site import FakeSite
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+def timed(fn, *args, repeat: int = 1, **kwargs):
+    """
+    Best wall time over `repeat` calls, and the last return value.
+    """
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+def peak_mb(fn, *args, **kwargs) -> float:
+    # peak traced allocation of one call (numpy buffers included)
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2**20, 1)
+
+def result(seconds: float, n: int, unit: str) -> dict:
+    return {
+        "seconds": round(seconds, 4),
+        "n": n,
+        "unit": unit,
+        "per_sec": round(n / seconds, 1) if seconds > 0 else None,
+    }
+
+def bench_links(site: FakeSite) -> dict:
+    import fetch_sources
+    html = site.list_page(1)
+    # a big listing page: every article linked from one document
+    big = html.replace(b"</ul>", b"".join(
+        f"<li><a href=\"/es/novedades/post-{i}/\">Post {i}</a></li>".encode() for i in range(5000)
+    ) + b"</ul>").decode("utf-8")
+    regex = r"^http://127\.0\.0\.1:\d+/es/novedades/.*"
+    seconds, links = timed(fetch_sources.extract_links_from_list, big, regex, site.base_url + "/es/novedades/", repeat=5)
+    return result(seconds, len(links), "links")
+
+def bench_sitemap(site: FakeSite, cache_dir: Path) -> dict:
+    import fetch_sources
+    import http_cache
+    http_cache.CACHE_DIR = cache_dir
+    url = site.base_url + "/sitemap_index.xml"
+    cold, urls = timed(fetch_sources.parse_sitemap_urls, url, max_urls=10**9)
+    warm, _ = timed(fetch_sources.parse_sitemap_urls, url, max_urls=10**9, repeat=3)
+    out = result(warm, len(urls), "urls")
+    out["cold_seconds"] = round(cold, 4)
+    return out
+
+def bench_extract(site: FakeSite) -> dict:
+    import fetch_sources
+    bodies = [site.article(i) for i in range(50)]
+    seconds, _ = timed(lambda: [fetch_sources.parse_article(b) for b in bodies])
+    out = result(seconds, len(bodies), "articles")
+    net, _ = timed(lambda: [fetch_sources.extract_article(f"{site.base_url}/es/novedades/post-{i}/") for i in range(10)])
+    out["with_network_seconds_per_article"] = round(net / 10, 4)
+    return out
+
+def bench_analyze(csv_path: Path, n: int) -> dict:
+    import analyze
+    analyze.DATA_PATH = csv_path
+    cfg = analyze.load_config()
+    load_s, df = timed(analyze.load_posts)
+    classify_s, df = timed(analyze.classify, df, cfg, use_cache=False)
+    cat_s, _ = timed(analyze.assign_categories, df.copy(), cfg)
+    agg_s, agg = timed(analyze.aggregate, df)
+    opp_s, opportunities = timed(analyze.compute_opportunities, agg)
+    report_s, _ = timed(lambda: (analyze.build_report_md(agg, opportunities),
+                                 analyze.build_brief_json(agg, opportunities)))
+    del df
+    # --stream: same aggregates, memory bounded by one chunk
+    stream_s, _ = timed(analyze.stream_aggregate, cfg, analyze.CHUNKSIZE, use_cache=False)
+    stream = result(stream_s, n, "rows")
+    stream["peak_mb"] = peak_mb(analyze.stream_aggregate, cfg, analyze.CHUNKSIZE, use_cache=False)
+    stream["in_memory_peak_mb"] = peak_mb(
+        lambda: analyze.aggregate(analyze.classify(analyze.load_posts(), cfg, use_cache=False)))
+    return {
+        "load_posts": result(load_s, n, "rows"),
+        "classify": result(classify_s, n, "rows"),
+        "assign_categories": result(cat_s, n, "rows"),
+        "aggregate": result(agg_s, n, "rows"),
+        "compute_opportunities": result(opp_s, n, "rows"),
+        "render_report_brief": result(report_s, n, "rows"),
+        "stream_aggregate": stream,
+    }
+
+def bench_end_to_end(site: FakeSite, workdir: Path) -> dict:
+    """
+    Full weekly run in a scratch copy of the repo: fetch_sources.py against
+    the fake site (cold, then warm), then analyze.py.
+    """
+    run_root = workdir / "repo"
+    shutil.copytree(SRC, run_root / "src", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(ROOT / "config", run_root / "config")
+    (run_root / "data").mkdir(parents=True)
+    (run_root / "reports").mkdir()
+    sources = {
+        "crawl": {"host_delay": 0.0, "host_concurrency": 8},
+        "sources": [{
+            "name": "Fake",
+            "url": f"{site.base_url}/es/novedades/",
+            "base_url": site.base_url,
+            "include_url_regex": "^" + re.escape(site.base_url) + "/es/novedades/post-.*",
+        }],
+    }
+    (run_root / "config" / "sources.yaml").write_text(yaml.safe_dump(sources, sort_keys=False), encoding="utf-8")
+
+    def run(script: str, *args):
+        proc = subprocess.run([sys.executable, str(run_root / "src" / script), *args],
+                              capture_output=True, text=True, cwd=run_root)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{script} failed:\n{proc.stdout}\n{proc.stderr}")
+        return proc
+
+    before = site.requests
+    cold, _ = timed(run, "fetch_sources.py")
+    cold_requests = site.requests - before
+    before = site.requests
+    warm, _ = timed(run, "fetch_sources.py")
+    warm_requests = site.requests - before
+    analyze_s, _ = timed(run, "analyze.py")
+    with open(run_root / "data" / "posts.csv", encoding="utf-8", newline="") as f:
+        rows = sum(1 for _ in csv.DictReader(f))
+    return {
+        "fetch_cold": {**result(cold, rows, "articles"), "requests": cold_requests},
+        "fetch_warm": {**result(warm, rows, "articles"), "requests": warm_requests},
+        "analyze": result(analyze_s, rows, "rows"),
+    }
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    out = {}
+    for k, v in results.items():
+        if isinstance(v, dict) and "seconds" in v:
+            out[prefix + k] = v["seconds"]
+        elif isinstance(v, dict):
+            out.update(flatten(v, f"{prefix}{k}."))
+    return out
+
+def compare(current: dict, previous_path: Path):
+    previous = json.loads(previous_path.read_text(encoding="utf-8"))
+    cur, prev = flatten(current["results"]), flatten(previous["results"])
+    print(f"\nvs {previous_path.name} ({previous.get('git_rev', '?')}):")
+    for k in sorted(cur):
+        if k in prev and prev[k]:
+            delta = (cur[k] - prev[k]) / prev[k] * 100
+            flag = "  <-- slower" if delta > 10 else ""
+            print(f"  {k:45s} {prev[k]:10.4f}s -> {cur[k]:10.4f}s  {delta:+6.1f}%{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument("--sizes", default="1k,100k", help=f"corpus sizes among {','.join(SIZES)}")
+    parser.add_argument("--articles", type=int, default=200, help="articles on the fake site (end-to-end)")
+    parser.add_argument("--sitemap-urls", type=int, default=50_000, help="URLs in the fake sitemaps")
+    parser.add_argument("--latency", type=float, default=0.01, help="fake site latency per request (s)")
+    parser.add_argument("--skip-e2e", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="inosearch-bench-") as tmp:
+        tmp = Path(tmp)
+        site = FakeSite(articles=args.sitemap_urls, latency=0.0)
+        server = site.start()
+        print("[bench] extract_links_from_list")
+        results["extract_links_from_list"] = bench_links(site)
+        print("[bench] parse_sitemap_urls")
+        results["parse_sitemap_urls"] = bench_sitemap(site, tmp / "http_cache")
+        print("[bench] extract_article")
+        results["extract_article"] = bench_extract(site)
+        server.shutdown()
+
+        for label in args.sizes.split(","):
+            n = SIZES[label.strip().lower()]
+            print(f"[bench] analyze on {label} synthetic posts")
+            csv_path = synth.write_posts(tmp / f"posts_{label}.csv", n)
+            results[f"analyze_{label}"] = bench_analyze(csv_path, n)
+            os.remove(csv_path)
+
+        if not args.skip_e2e:
+            print(f"[bench] end-to-end ({args.articles} articles, {args.latency}s latency)")
+            site = FakeSite(articles=args.articles, latency=args.latency)
+            server = site.start()
+            results["end_to_end"] = bench_end_to_end(site, tmp)
+            server.shutdown()
+
+    out = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": git_rev(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} / {os.cpu_count()} cpu",
+        "results": results,
+    }
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    previous = sorted(RESULTS_DIR.glob("*.json"))
+    path = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"OK — Benchmark results: {path}")
+    if previous:
+        compare(out, previous[-1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import sqlite3
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_PATH = ROOT / "data" / "cache" / "analysis.sqlite"
+
+# bump when the derived features change shape or meaning
+CACHE_VERSION = "3"
+
+# weekly rollups: one row per (week, competitor, theme, format); ALL in a
+# dimension aggregates over it (theme=ALL, format=ALL: every post of the week)
+ALL = "*"
+
+def config_hash(cfg_path: Path) -> str:
+    h = hashlib.sha256(CACHE_VERSION.encode("utf-8"))
+    h.update(Path(cfg_path).read_bytes())
+    return h.hexdigest()
+
+def connect(cfg_hash: str, path: Path | None = None) -> sqlite3.Connection:
+    """
+    Opens the per-post feature cache and the weekly rollups. A different
+    keywords.yaml hash (or CACHE_VERSION) drops both (full rebuild).
+    """
+    path = path or CACHE_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    row = conn.execute("SELECT value FROM meta WHERE key = 'config_hash'").fetchone()
+    if row is None or row[0] != cfg_hash:
+        if row is not None:
+            print("[analyze] keywords.yaml changed: rebuilding the analysis cache")
+        conn.execute("DROP TABLE IF EXISTS features")
+        conn.execute("DROP TABLE IF EXISTS weekly")
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('config_hash', ?)", (cfg_hash,))
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS features (
+            post_hash INTEGER PRIMARY KEY,
+            cat_mask INTEGER,
+            fmt_mask INTEGER,
+            engagement_score INTEGER,
+            week TEXT,
+            competitor TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS weekly (
+            week TEXT,
+            competitor TEXT,
+            theme TEXT,
+            format TEXT,
+            posts INTEGER,
+            engagement INTEGER,
+            PRIMARY KEY (week, competitor, theme, format)
+        )
+    """)
+    conn.commit()
+    return conn
+
+FEATURE_COLUMNS = "post_hash, cat_mask, fmt_mask, engagement_score, week, competitor"
+
+def load_features(conn: sqlite3.Connection, hashes=None) -> pd.DataFrame:
+    """
+    Every cached post, or only those of `hashes` (one chunk of posts.csv).
+    """
+    if hashes is None:
+        return pd.read_sql_query(f"SELECT {FEATURE_COLUMNS} FROM features", conn).set_index("post_hash")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (post_hash INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.wanted")
+    conn.executemany("INSERT OR IGNORE INTO temp.wanted VALUES (?)", ((int(h),) for h in hashes))
+    return pd.read_sql_query(
+        f"SELECT {FEATURE_COLUMNS} FROM features WHERE post_hash IN (SELECT post_hash FROM temp.wanted)", conn
+    ).set_index("post_hash")
+
+def mark_seen(conn: sqlite3.Connection, hashes) -> int:
+    # posts read from posts.csv by this connection (temp table: gone on close);
+    # returns how many of `hashes` it had not seen yet
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (post_hash INTEGER PRIMARY KEY)")
+    before = conn.total_changes
+    conn.executemany("INSERT OR IGNORE INTO temp.seen VALUES (?)", ((int(h),) for h in hashes))
+    return conn.total_changes - before
+
+def unseen_features(conn: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Cached posts this connection has not marked seen: edited or removed
+    from posts.csv once the whole file has been read.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (post_hash INTEGER PRIMARY KEY)")
+    return pd.read_sql_query(
+        f"SELECT {FEATURE_COLUMNS} FROM features WHERE post_hash NOT IN (SELECT post_hash FROM temp.seen)", conn
+    ).set_index("post_hash")
+
+def store_features(conn: sqlite3.Connection, feats: pd.DataFrame):
+    """
+    feats: indexed by post_hash, same columns as load_features.
+    store_features / prune / apply_rollups leave the commit to the caller,
+    so that features and the rollups derived from them move together.
+    """
+    rows = zip(
+        (int(h) for h in feats.index),
+        (int(m) for m in feats["cat_mask"]),
+        (int(m) for m in feats["fmt_mask"]),
+        (int(e) for e in feats["engagement_score"]),
+        feats["week"].tolist(),
+        feats["competitor"].tolist(),
+    )
+    conn.executemany("INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+def prune(conn: sqlite3.Connection, stale_hashes):
+    # rows edited or removed from posts.csv
+    conn.executemany("DELETE FROM features WHERE post_hash = ?", ((int(h),) for h in stale_hashes))
+
+def load_rollups(conn: sqlite3.Connection) -> pd.DataFrame:
+    return pd.read_sql_query("SELECT week, competitor, theme, format, posts, engagement FROM weekly", conn)
+
+def apply_rollups(conn: sqlite3.Connection, delta: pd.DataFrame):
+    """
+    Adds a delta (same columns as load_rollups; negative for posts that
+    left posts.csv) to the weekly rollups.
+    """
+    if delta.empty:
+        return
+    rows = zip(
+        delta["week"].tolist(), delta["competitor"].tolist(), delta["theme"].tolist(), delta["format"].tolist(),
+        (int(n) for n in delta["posts"]), (int(e) for e in delta["engagement"]),
+    )
+    conn.executemany("""
+        INSERT INTO weekly VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (week, competitor, theme, format) DO UPDATE SET
+            posts = posts + excluded.posts,
+            engagement = engagement + excluded.engagement
+    """, rows)
+    conn.execute("DELETE FROM weekly WHERE posts <= 0")
@@ -1,115 +1,547 @@
-import re
 import json
+import time
+import argparse
 import yaml
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from collections import Counter, defaultdict
 
+import analysis_cache
+import metrics
+from keyword_matcher import KeywordMatcher
+from textnorm import normalize
+
 ROOT = Path(__file__).resolve().parents[1]
 DATA_PATH = ROOT / "data" / "posts.csv"
 CFG_PATH = ROOT / "config" / "keywords.yaml"
 REPORTS_DIR = ROOT / "reports"
+POST_COLUMNS = ["platform","competitor","author","date","url","content","likes","comments","reposts"]
+
+# boolean hit-matrix columns: "cat:<label>" / "fmt:<key>"
+HIT_PREFIXES = {"categories": "cat:", "formats": "fmt:"}
+FALLBACKS = {"categories": "(non classé)", "formats": "(non détecté)"}
 
-def normalize(text: str) -> str:
-    if not isinstance(text, str):
-        return ""
-    text = text.lower().strip()
-    text = re.sub(r"\s+", " ", text)
-    return text
+# posts kept by the aggregation: the opportunity TOP is capped at 15,
+# the report and the brief show 10
+TOP_K = 15
+TOP_POSTS = 10
 
-def contains_any(text: str, keywords: list[str]) -> bool:
-    for kw in keywords:
-        kw_n = normalize(kw)
-        if kw_n and kw_n in text:
-            return True
-    return False
+# --stream: rows of posts.csv read at a time
+CHUNKSIZE = 50_000
+# characters of a top post kept by the aggregation (brief: 160, report: 120)
+SNIPPET_CHARS = 160
+
+# tendances : 4 dernières semaines vs les 12 précédentes
+TREND_RECENT_WEEKS = 4
+TREND_BASELINE_WEEKS = 12
 
 def load_config():
     with open(CFG_PATH, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
-def load_posts():
-    df = pd.read_csv(DATA_PATH)
-    expected = ["platform","competitor","author","date","url","content","likes","comments","reposts"]
-    for col in expected:
+def clean_posts(df):
+    """
+    Raw posts.csv rows -> typed columns: counters as int, text as str
+    ("" when empty, whatever dtype a chunk was inferred with, so that post
+    hashes do not depend on how the file was read).
+    content_norm is written at ingest by fetch_sources; only the rows
+    without it (posts added by hand) are normalized here.
+    """
+    for col in POST_COLUMNS + ["content_norm"]:
         if col not in df.columns:
             df[col] = ""
     for c in ["likes","comments","reposts"]:
         df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(int)
-    df["content_norm"] = df["content"].apply(normalize)
-    df["competitor"] = df["competitor"].fillna("").astype(str)
-    df["platform"] = df["platform"].fillna("").astype(str)
-    df["date"] = df["date"].fillna("").astype(str)
+    for c in ["platform","competitor","author","date","url","content","content_norm"]:
+        df[c] = df[c].fillna("").astype(str)
+    missing = (df["content_norm"] == "") & (df["content"] != "")
+    if missing.any():
+        df.loc[missing, "content_norm"] = df.loc[missing, "content"].apply(normalize)
     return df
 
-def assign_categories(df, cfg):
-    categories = cfg.get("categories", {})
-    out = []
-    for _, row in df.iterrows():
-        text = row["content_norm"]
-        matched = []
-        for cat_key, cat in categories.items():
-            kws = cat.get("keywords", [])
-            if contains_any(text, kws):
-                matched.append(cat.get("label", cat_key))
-        out.append(matched if matched else ["(non classé)"])
-    df["categories"] = out
-    return df
+def load_posts():
+    return clean_posts(pd.read_csv(DATA_PATH))
 
-def assign_formats(df, cfg):
-    formats = cfg.get("formats", {})
-    out = []
-    for _, row in df.iterrows():
-        text = row["content_norm"]
-        matched = []
-        for fmt_key, fmt in formats.items():
-            kws = fmt.get("keywords", [])
-            if contains_any(text, kws):
-                matched.append(fmt_key)
-        out.append(matched if matched else ["(non détecté)"])
-    df["formats"] = out
+def iter_posts(chunksize: int = CHUNKSIZE):
+    # load_posts() `chunksize` rows at a time
+    with pd.read_csv(DATA_PATH, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield clean_posts(chunk)
+
+def keyword_groups(section: dict, use_label: bool) -> dict[str, list[str]]:
+    """
+    {key: {label, keywords}} (keywords.yaml) -> {label or key: [normalized keywords]}
+    """
+    groups = {}
+    for key, item in section.items():
+        name = item.get("label", key) if use_label else key
+        groups.setdefault(name, []).extend(normalize(kw) for kw in item.get("keywords", []))
+    return groups
+
+def build_matchers(cfg):
+    # compiled once per run, then one pass per document
+    return (
+        KeywordMatcher(keyword_groups(cfg.get("categories", {}), use_label=True)),
+        KeywordMatcher(keyword_groups(cfg.get("formats", {}), use_label=False)),
+    )
+
+def hit_matrix(texts, matcher, col):
+    """
+    Boolean matrix posts × labels, one matcher pass per post whatever the
+    number of labels (+ a fallback column for posts matching nothing).
+    """
+    prefix = HIT_PREFIXES[col]
+    texts = texts.fillna("").astype(str)
+    n = len(matcher.labels)
+    hits = np.zeros((len(texts), n + 1), dtype=bool)
+    for row, text in enumerate(texts.tolist()):
+        for i in matcher.match_ids(text):
+            hits[row, i] = True
+    hits[:, n] = ~hits[:, :n].any(axis=1)
+    return pd.DataFrame(hits, index=texts.index, columns=[prefix + l for l in labels_of(matcher, col)])
+
+def hit_columns(df, col):
+    prefix = HIT_PREFIXES[col]
+    return [c for c in df.columns if c.startswith(prefix)]
+
+def hits_to_lists(hits, col) -> list[list[str]]:
+    prefix = HIT_PREFIXES[col]
+    labels = np.array([c[len(prefix):] for c in hits.columns], dtype=object)
+    return [labels[row].tolist() for row in hits.to_numpy(dtype=bool)]
+
+def _assign(df, matcher, col):
+    hits = hit_matrix(df["content_norm"], matcher, col)
+    df = df.drop(columns=hit_columns(df, col))
+    df = pd.concat([df, hits], axis=1)
+    df[col] = hits_to_lists(hits, col)
     return df
 
-def score_engagement(df):
-    df["engagement_score"] = df["likes"] + 2*df["comments"] + 3*df["reposts"]
+def assign_categories(df, cfg, matcher=None):
+    if matcher is None:
+        matcher = build_matchers(cfg)[0]
+    return _assign(df, matcher, "categories")
+
+def assign_formats(df, cfg, matcher=None):
+    if matcher is None:
+        matcher = build_matchers(cfg)[1]
+    return _assign(df, matcher, "formats")
+
+def labels_of(matcher, col) -> list[str]:
+    # same order as the hit_matrix columns
+    return matcher.labels + [FALLBACKS[col]]
+
+def masks_from_hits(hits) -> np.ndarray:
+    weights = np.left_shift(np.int64(1), np.arange(hits.shape[1], dtype=np.int64))
+    return hits.to_numpy(dtype=np.int64) @ weights
+
+def hits_from_masks(masks, labels, col, index):
+    bits = (np.asarray(masks, dtype=np.int64)[:, None] >> np.arange(len(labels), dtype=np.int64)) & 1
+    return pd.DataFrame(bits.astype(bool), index=index, columns=[HIT_PREFIXES[col] + l for l in labels])
+
+def week_of(dates) -> pd.Series:
+    """
+    "YYYY-MM-DD…" -> Monday of its ISO week ("YYYY-MM-DD"), "" when undated.
+    """
+    d = pd.to_datetime(dates.fillna("").astype(str).str[:10], format="%Y-%m-%d", errors="coerce")
+    monday = d - pd.to_timedelta(d.dt.weekday, unit="D")
+    return monday.dt.strftime("%Y-%m-%d").fillna("")
+
+def derive_features(df, cat_matcher, fmt_matcher):
+    """
+    Per-post derived features: category/format bitmasks (bit i = label i
+    of labels_of) of content_norm, engagement score, plus the week and
+    competitor keys of the weekly rollups.
+    """
+    return pd.DataFrame({
+        "cat_mask": masks_from_hits(hit_matrix(df["content_norm"], cat_matcher, "categories")),
+        "fmt_mask": masks_from_hits(hit_matrix(df["content_norm"], fmt_matcher, "formats")),
+        "engagement_score": df["likes"] + 2*df["comments"] + 3*df["reposts"],
+        "week": week_of(df["date"]),
+        "competitor": df["competitor"],
+    }, index=df.index)
+
+def rollup_rows(posts, sign: int = 1):
+    """
+    Weekly rollup rows of `posts` (week, competitor, categories/formats
+    lists, engagement_score): post count and engagement sum for every
+    week × competitor × (theme | ALL) × (format | ALL), times `sign`.
+    Undated posts are left out.
+    """
+    ALL = analysis_cache.ALL
+    posts = posts.loc[posts["week"].fillna("") != "", ["week", "competitor", "categories", "formats", "engagement_score"]]
+    frames = []
+    for by_theme in (False, True):
+        for by_format in (False, True):
+            f = posts.explode("categories") if by_theme else posts.assign(categories=ALL)
+            f = f.explode("formats") if by_format else f.assign(formats=ALL)
+            frames.append(
+                f.groupby(["week", "competitor", "categories", "formats"], sort=False)["engagement_score"]
+                .agg(["size", "sum"]).reset_index()
+            )
+    out = pd.concat(frames, ignore_index=True)
+    out.columns = ["week", "competitor", "theme", "format", "posts", "engagement"]
+    out[["posts", "engagement"]] = out[["posts", "engagement"]].astype(np.int64) * sign
+    return out
+
+def feature_posts(feats, cat_labels, fmt_labels):
+    # cached features -> the columns rollup_rows needs
+    return pd.DataFrame({
+        "week": feats["week"],
+        "competitor": feats["competitor"],
+        "categories": hits_to_lists(hits_from_masks(feats["cat_mask"], cat_labels, "categories", feats.index), "categories"),
+        "formats": hits_to_lists(hits_from_masks(feats["fmt_mask"], fmt_labels, "formats", feats.index), "formats"),
+        "engagement_score": feats["engagement_score"],
+    }, index=feats.index)
+
+def update_cache(conn, df, cat_matcher, fmt_matcher):
+    """
+    derive_features through the analysis cache: only posts whose hash
+    (all columns of the row) is unknown are recomputed, stored and added
+    to the weekly rollups. The posts of df are marked seen for prune_cache.
+    Returns (features aligned on df, number of new posts, number of rows
+    repeating a post already read on this connection: exact duplicates
+    in posts.csv share one hash).
+    """
+    post_hash = pd.util.hash_pandas_object(df[POST_COLUMNS], index=False).to_numpy().view(np.int64)
+    n_dup = len(post_hash) - analysis_cache.mark_seen(conn, post_hash)
+    cached = analysis_cache.load_features(conn, post_hash)
+    known = np.isin(post_hash, cached.index.to_numpy())
+    n_new = len(np.unique(post_hash[~known]))
+    if n_new:
+        fresh = derive_features(df.loc[~known], cat_matcher, fmt_matcher)
+        fresh.index = post_hash[~known]
+        fresh = fresh[~fresh.index.duplicated()]
+        analysis_cache.store_features(conn, fresh)
+        posts = feature_posts(fresh, labels_of(cat_matcher, "categories"), labels_of(fmt_matcher, "formats"))
+        analysis_cache.apply_rollups(conn, rollup_rows(posts))
+        cached = pd.concat([cached, fresh]) if len(cached) else fresh
+    feats = cached.reindex(post_hash)
+    feats.index = df.index
+    return feats, n_new, n_dup
+
+def prune_cache(conn, cat_matcher, fmt_matcher):
+    """
+    Once all of posts.csv went through update_cache: the cached posts not
+    seen (edited or removed rows) are subtracted from the weekly rollups
+    and dropped.
+    """
+    stale = analysis_cache.unseen_features(conn)
+    if len(stale):
+        gone = feature_posts(stale, labels_of(cat_matcher, "categories"), labels_of(fmt_matcher, "formats"))
+        analysis_cache.apply_rollups(conn, rollup_rows(gone, sign=-1))
+        analysis_cache.prune(conn, stale.index)
+
+def log_cache(total: int, n_new: int, n_dup: int = 0):
+    hits = total - n_new - n_dup
+    dups = f", {n_dup} exact duplicate rows" if n_dup else ""
+    print(f"[analyze] Posts classified: {n_new} new/changed, {hits} from cache{dups}")
+    metrics.incr("analysis_cache.posts", hits, result="hit")
+    metrics.incr("analysis_cache.posts", n_new, result="miss")
+    metrics.incr("analysis_cache.posts", n_dup, result="duplicate")
+
+def cached_features(df, cat_matcher, fmt_matcher):
+    """
+    update_cache + prune_cache over the whole of posts.csv in df; a
+    keywords.yaml change empties the cache first.
+    """
+    conn = analysis_cache.connect(analysis_cache.config_hash(CFG_PATH))
+    try:
+        feats, n_new, n_dup = update_cache(conn, df, cat_matcher, fmt_matcher)
+        prune_cache(conn, cat_matcher, fmt_matcher)
+        conn.commit()
+    finally:
+        conn.close()
+    log_cache(len(df), n_new, n_dup)
+    return feats
+
+def cache_usable(cat_labels, fmt_labels) -> bool:
+    # bitmasks are int64
+    return max(len(cat_labels), len(fmt_labels)) < 63
+
+def classify(df, cfg, use_cache: bool = True):
+    """
+    Adds the hit matrices, categories/formats lists and engagement_score
+    (df comes from load_posts: content_norm is filled).
+    """
+    cat_matcher, fmt_matcher = build_matchers(cfg)
+    cat_labels = labels_of(cat_matcher, "categories")
+    fmt_labels = labels_of(fmt_matcher, "formats")
+    if use_cache and cache_usable(cat_labels, fmt_labels):
+        feats = cached_features(df, cat_matcher, fmt_matcher)
+    else:
+        feats = derive_features(df, cat_matcher, fmt_matcher)
+    return with_features(df, feats, cat_labels, fmt_labels)
+
+def with_features(df, feats, cat_labels, fmt_labels):
+    # derived features -> hit matrices, categories/formats lists, engagement_score
+    cat_hits = hits_from_masks(feats["cat_mask"], cat_labels, "categories", df.index)
+    fmt_hits = hits_from_masks(feats["fmt_mask"], fmt_labels, "formats", df.index)
+    df = df.drop(columns=hit_columns(df, "categories") + hit_columns(df, "formats"))
+    df = pd.concat([df, cat_hits, fmt_hits], axis=1)
+    df["categories"] = hits_to_lists(cat_hits, "categories")
+    df["formats"] = hits_to_lists(fmt_hits, "formats")
+    df["engagement_score"] = feats["engagement_score"].astype(int)
     return df
 
+def ordered_counts(counts, first, labels) -> pd.Series:
+    # non-zero counts, descending; ties keep first-occurrence order like value_counts
+    order = [i for i in np.lexsort((np.arange(len(labels)), first, -counts)) if counts[i] > 0]
+    return pd.Series([int(counts[i]) for i in order], index=[labels[i] for i in order], dtype=int)
+
 def explode_counts(df, col):
-    return df.explode(col)[col].value_counts()
-
-def competitor_theme_matrix(df):
-    # Returns: dict competitor -> Counter(theme)
-    comp = defaultdict(Counter)
-    for row in df.itertuples(index=False):
-        competitor = getattr(row, "competitor") or "(inconnu)"
-        for c in getattr(row, "categories"):
-            comp[competitor][c] += 1
-    return comp
-
-def competitor_format_matrix(df):
-    comp = defaultdict(Counter)
-    for row in df.itertuples(index=False):
-        competitor = getattr(row, "competitor") or "(inconnu)"
-        for f in getattr(row, "formats"):
-            comp[competitor][f] += 1
-    return comp
-
-def compute_opportunities(df):
+    cols = hit_columns(df, col)
+    if not cols:
+        return df.explode(col)[col].value_counts()
+    # column sums over the hit matrix
+    hits = df[cols].to_numpy(dtype=bool)
+    prefix = HIT_PREFIXES[col]
+    return ordered_counts(hits.sum(axis=0), hits.argmax(axis=0), [c[len(prefix):] for c in cols])
+
+class Aggregator:
+    """
+    Everything the report and the brief need, in one pass over the
+    classified posts: volume, top posts, category/format counts and the
+    competitor matrices. update() folds one frame (or chunk) at a time,
+    result() can be called at any point. Its size does not depend on the
+    number of posts: the top posts only keep a snippet of their content.
+    """
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.posts = 0
+        self.top = None
+        self.labels = {}
+        self.counts = {}
+        self.first = {}
+        self.by_competitor = {}
+        self.competitors = set()
+
+    def update(self, df):
+        if len(df) == 0:
+            return self
+        offset = self.posts
+        self.posts += len(df)
+
+        # top-k: the kept rows come first, so nlargest(keep="first") keeps
+        # the earliest post among equal scores, across chunks too
+        top = df.nlargest(self.top_k, "engagement_score", keep="first")
+        top = top.drop(columns=["content_norm"], errors="ignore")
+        top["content"] = top["content"].astype(str).str[:SNIPPET_CHARS]
+        if self.top is not None:
+            top = pd.concat([self.top, top]).nlargest(self.top_k, "engagement_score", keep="first")
+        self.top = top
+
+        keys = df["competitor"].fillna("").astype(str).replace("", "(inconnu)")
+        self.competitors.update(c for c in df["competitor"].tolist() if c)
+        for col, prefix in HIT_PREFIXES.items():
+            cols = hit_columns(df, col)
+            if col not in self.labels:
+                self.labels[col] = [c[len(prefix):] for c in cols]
+                self.counts[col] = np.zeros(len(cols), dtype=np.int64)
+                self.first[col] = np.full(len(cols), np.iinfo(np.int64).max, dtype=np.int64)
+            if not cols:
+                continue
+            hits = df[cols].to_numpy(dtype=bool)
+            any_hit = hits.any(axis=0)
+            first = np.where(any_hit, offset + hits.argmax(axis=0), np.iinfo(np.int64).max)
+            self.counts[col] += hits.sum(axis=0)
+            self.first[col] = np.minimum(self.first[col], first)
+            sums = pd.DataFrame(hits, columns=cols).groupby(keys.to_numpy(), sort=False).sum()
+            matrix = self.by_competitor.setdefault(col, {})
+            for competitor, row in zip(sums.index, sums.to_numpy()):
+                if competitor in matrix:
+                    matrix[competitor] += row
+                else:
+                    matrix[competitor] = row.astype(np.int64)
+        return self
+
+    def matrix(self, col) -> dict:
+        """
+        competitor -> Counter(label), labels in config order.
+        """
+        out = defaultdict(Counter)
+        labels = self.labels.get(col, [])
+        for competitor, row in self.by_competitor.get(col, {}).items():
+            out[competitor] = Counter({label: int(n) for label, n in zip(labels, row) if n})
+        return out
+
+    def label_counts(self, col) -> pd.Series:
+        if col not in self.labels:
+            return pd.Series([], dtype=int)
+        return ordered_counts(self.counts[col], self.first[col], self.labels[col])
+
+    def result(self) -> dict:
+        return {
+            "posts": self.posts,
+            "top": pd.DataFrame() if self.top is None else self.top,
+            "categories": self.label_counts("categories"),
+            "formats": self.label_counts("formats"),
+            "competitor_themes": self.matrix("categories"),
+            "competitor_formats": self.matrix("formats"),
+            "competitors": sorted(self.competitors),
+        }
+
+def aggregate(df) -> dict:
+    return Aggregator().update(df).result()
+
+def stream_aggregate(cfg, chunksize: int = CHUNKSIZE, use_cache: bool = True):
+    """
+    load_posts + classify + aggregate with posts.csv read `chunksize` rows
+    at a time: memory is bounded by one chunk and the Aggregator, not by
+    the corpus. Features and weekly rollups go through the analysis cache
+    as in classify(); use_cache=False gives it a throwaway in-memory
+    database. Returns (aggregate result, weekly rollups).
+    """
+    cat_matcher, fmt_matcher = build_matchers(cfg)
+    cat_labels = labels_of(cat_matcher, "categories")
+    fmt_labels = labels_of(fmt_matcher, "formats")
+    if not cache_usable(cat_labels, fmt_labels):
+        raise ValueError("--stream: more than 62 categories or formats in keywords.yaml")
+    agg = Aggregator()
+    n_new = n_dup = 0
+    path = None if use_cache else Path(":memory:")
+    conn = analysis_cache.connect(analysis_cache.config_hash(CFG_PATH), path)
+    try:
+        for chunk in iter_posts(chunksize):
+            feats, new, dup = update_cache(conn, chunk, cat_matcher, fmt_matcher)
+            conn.commit()
+            n_new += new
+            n_dup += dup
+            agg.update(with_features(chunk, feats, cat_labels, fmt_labels))
+            metrics.incr("analyze.chunks")
+        prune_cache(conn, cat_matcher, fmt_matcher)
+        conn.commit()
+        rollups = analysis_cache.load_rollups(conn)
+    finally:
+        conn.close()
+    log_cache(agg.posts, n_new, n_dup)
+    return agg.result(), rollups
+
+def weekly_rollups(df, cfg, use_cache: bool = True):
+    """
+    The weekly rollups of the classified posts: read from the analysis
+    cache (kept up to date by classify), or rebuilt from df without it.
+    """
+    cat_matcher, fmt_matcher = build_matchers(cfg)
+    if use_cache and cache_usable(labels_of(cat_matcher, "categories"), labels_of(fmt_matcher, "formats")):
+        conn = analysis_cache.connect(analysis_cache.config_hash(CFG_PATH))
+        try:
+            return analysis_cache.load_rollups(conn)
+        finally:
+            conn.close()
+    posts = df.drop_duplicates(subset=POST_COLUMNS)
+    return rollup_rows(posts.assign(week=week_of(posts["date"])))
+
+def momentum(recent: int, baseline: int) -> float:
+    # rythme hebdo récent / rythme de référence − 1 (lissé de ½ post par fenêtre) ; 0 = stable
+    return round(((recent + 0.5) / TREND_RECENT_WEEKS) / ((baseline + 0.5) / TREND_BASELINE_WEEKS) - 1, 3)
+
+def compute_trends(rollups, today: date | None = None) -> dict:
+    """
+    Fenêtres glissantes sur les rollups hebdo : les TREND_RECENT_WEEKS
+    dernières semaines (jusqu’à la plus récente semaine avec des posts, au
+    plus la semaine en cours) vs les TREND_BASELINE_WEEKS précédentes.
+    Thèmes / formats : volumes, momentum, engagement moyen ; concurrents :
+    part de voix et son évolution ; combinaisons thème × format en hausse.
+    """
+    ALL = analysis_cache.ALL
+    today = today or date.today()
+    current = (today - timedelta(days=today.weekday())).isoformat()
+    if rollups.empty:
+        return {}
+    weeks = rollups.loc[rollups["week"] <= current, "week"]
+    if weeks.empty:
+        return {}
+    end = date.fromisoformat(weeks.max())
+    start = end - timedelta(weeks=TREND_RECENT_WEEKS - 1)
+    base_end = start - timedelta(weeks=1)
+    base_start = start - timedelta(weeks=TREND_BASELINE_WEEKS)
+
+    w = rollups["week"]
+    window = np.select(
+        [(w >= start.isoformat()) & (w <= end.isoformat()), (w >= base_start.isoformat()) & (w <= base_end.isoformat())],
+        ["recent", "baseline"], default="",
+    )
+    r = rollups[window != ""].assign(window=window[window != ""])
+
+    def windows(mask, keys):
+        t = r[mask].groupby(keys + ["window"])[["posts", "engagement"]].sum().unstack("window", fill_value=0)
+        return t.reindex(columns=pd.MultiIndex.from_product([["posts", "engagement"], ["recent", "baseline"]]), fill_value=0)
+
+    def label_trends(mask, key, fallback):
+        rows = []
+        for label, v in windows(mask, [key]).iterrows():
+            if label == fallback:
+                continue
+            recent, baseline = int(v[("posts", "recent")]), int(v[("posts", "baseline")])
+            rows.append({
+                key: label,
+                "recent_posts": recent,
+                "baseline_posts": baseline,
+                "momentum": momentum(recent, baseline),
+                "recent_avg_engagement": round(v[("engagement", "recent")] / recent, 1) if recent else 0.0,
+            })
+        rows.sort(key=lambda x: (-x["momentum"], -x["recent_posts"], x[key]))
+        return rows
+
+    themes = label_trends((r["theme"] != ALL) & (r["format"] == ALL), "theme", FALLBACKS["categories"])
+    formats = label_trends((r["theme"] == ALL) & (r["format"] != ALL), "format", FALLBACKS["formats"])
+
+    totals = windows((r["theme"] == ALL) & (r["format"] == ALL), ["competitor"])
+    sum_recent = int(totals[("posts", "recent")].sum())
+    sum_baseline = int(totals[("posts", "baseline")].sum())
+    share_of_voice = []
+    for competitor, v in totals.iterrows():
+        recent, baseline = int(v[("posts", "recent")]), int(v[("posts", "baseline")])
+        share_recent = recent / sum_recent if sum_recent else 0.0
+        share_baseline = baseline / sum_baseline if sum_baseline else 0.0
+        share_of_voice.append({
+            "competitor": competitor or "(inconnu)",
+            "recent_posts": recent,
+            "baseline_posts": baseline,
+            "recent_share": round(share_recent, 3),
+            "baseline_share": round(share_baseline, 3),
+            "delta_pts": round((share_recent - share_baseline) * 100, 1),
+        })
+    share_of_voice.sort(key=lambda x: (-x["recent_share"], -x["delta_pts"], x["competitor"]))
+
+    rising = []
+    pairs = windows((r["theme"] != ALL) & (r["format"] != ALL), ["theme", "format"])
+    for (theme, fmt), v in pairs.iterrows():
+        recent, baseline = int(v[("posts", "recent")]), int(v[("posts", "baseline")])
+        # au moins 2 posts récents : un post isolé n’est pas une tendance
+        if recent >= 2 and recent / TREND_RECENT_WEEKS > baseline / TREND_BASELINE_WEEKS \
+                and theme != FALLBACKS["categories"] and fmt != FALLBACKS["formats"]:
+            rising.append({"theme": theme, "format": fmt, "recent_posts": recent,
+                           "baseline_posts": baseline, "momentum": momentum(recent, baseline)})
+    rising.sort(key=lambda x: (-x["momentum"], -x["recent_posts"], x["theme"], x["format"]))
+
+    return {
+        "recent_weeks": [start.isoformat(), end.isoformat()],
+        "baseline_weeks": [base_start.isoformat(), base_end.isoformat()],
+        "themes": themes,
+        "formats": formats,
+        "share_of_voice": share_of_voice,
+        "rising_combinations": rising[:5],
+    }
+
+def compute_opportunities(agg):
     """
     Heuristique simple:
     - Traction: thèmes présents dans le TOP engagement
     - Rareté: thèmes peu couverts globalement
     => Opportunité = traction élevée * rareté
+    agg: résultat de aggregate() / Aggregator.result()
     """
-    if len(df) == 0:
+    if agg["posts"] == 0:
         return []
 
-    df_sorted = df.sort_values("engagement_score", ascending=False)
-    top_n = max(3, min(15, int(len(df)*0.3)))  # top 30% capped
-    top = df_sorted.head(top_n)
+    top_n = max(3, min(TOP_K, int(agg["posts"]*0.3)))  # top 30% capped
+    top = agg["top"].head(top_n)
 
-    global_counts = explode_counts(df, "categories")
+    global_counts = agg["categories"]
     top_counts = explode_counts(top, "categories")
 
     opportunities = []
@@ -129,12 +561,12 @@ def compute_opportunities(df):
     opportunities.sort(key=lambda x: x["opportunity_score"], reverse=True)
     return opportunities[:10]
 
-def build_brief_json(df, opportunities):
+def build_brief_json(agg, opportunities, trends=None):
     """
     Sortie structurée pour l’outil 2.
     On ne copie pas de texte concurrent: on ne sort que des résumés et extraits courts.
     """
-    top_posts = df.sort_values("engagement_score", ascending=False).head(10)
+    top_posts = agg["top"].head(TOP_POSTS)
     top_list = []
     for row in top_posts.itertuples(index=False):
         top_list.append({
@@ -144,16 +576,16 @@ def build_brief_json(df, opportunities):
             "score": int(row.engagement_score),
             "categories": list(row.categories),
             "formats": list(row.formats),
-            "snippet": str(row.content)[:160].replace("\n", " ")
+            "snippet": str(row.content)[:SNIPPET_CHARS].replace("\n", " ")
         })
 
-    comp_themes = competitor_theme_matrix(df)
-    comp_formats = competitor_format_matrix(df)
+    comp_themes = agg["competitor_themes"]
+    comp_formats = agg["competitor_formats"]
 
     brief = {
         "generated_at": datetime.now().isoformat(timespec="seconds"),
         "counts": {
-            "posts": int(len(df)),
+            "posts": int(agg["posts"]),
         },
         "top_posts": top_list,
         "competitors": {
@@ -161,9 +593,10 @@ def build_brief_json(df, opportunities):
                 "themes": dict(comp_themes[comp]),
                 "formats": dict(comp_formats[comp])
             }
-            for comp in sorted(set(df["competitor"].tolist())) if comp
+            for comp in agg["competitors"]
         },
         "opportunities": opportunities,
+        "trends": trends or {},
         "recommended_playbook": [
             "Produire un post clarificateur Bonificación SS vs Deducción I+D+i (périmètre, conditions, pièces).",
             "Exploiter un format récurrent (checklist / myth-busting) avec un niveau de preuve supérieur (méthodo, risques, exemples).",
@@ -172,16 +605,48 @@ def build_brief_json(df, opportunities):
     }
     return brief
 
-def build_report_md(df, opportunities):
+def trend_lines(trends) -> list[str]:
+    lines = []
+    if not trends:
+        lines.append("- (Pas assez de posts datés)")
+        return lines
+    r0, r1 = trends["recent_weeks"]
+    b0, b1 = trends["baseline_weeks"]
+    lines.append(f"_Semaines du {r0} au {r1} vs du {b0} au {b1} — momentum = rythme hebdo récent / rythme de référence − 1_")
+    lines.append("")
+    for title, key, rows in (("Thèmes", "theme", trends["themes"]), ("Formats", "format", trends["formats"])):
+        lines.append(f"**{title}**")
+        lines.append("")
+        lines.append(f"| {title[:-1]} | Posts ({TREND_RECENT_WEEKS} sem.) | Posts ({TREND_BASELINE_WEEKS} sem. préc.) | Momentum | Engagement moyen ({TREND_RECENT_WEEKS} sem.) |")
+        lines.append("|---|---:|---:|---:|---:|")
+        for t in rows:
+            lines.append(f"| {t[key]} | {t['recent_posts']} | {t['baseline_posts']} | {t['momentum']:+.2f} | {t['recent_avg_engagement']} |")
+        lines.append("")
+    lines.append("**Part de voix (concurrents)**")
+    lines.append("")
+    lines.append(f"| Concurrent | Posts ({TREND_RECENT_WEEKS} sem.) | Part ({TREND_RECENT_WEEKS} sem.) | Part ({TREND_BASELINE_WEEKS} sem. préc.) | Δ pts |")
+    lines.append("|---|---:|---:|---:|---:|")
+    for c in trends["share_of_voice"]:
+        lines.append(f"| {c['competitor']} | {c['recent_posts']} | {c['recent_share']:.1%} | {c['baseline_share']:.1%} | {c['delta_pts']:+.1f} |")
+    lines.append("")
+    lines.append("**Combinaisons thème × format en hausse**")
+    if trends["rising_combinations"]:
+        for c in trends["rising_combinations"]:
+            lines.append(f"- **{c['theme']} × {c['format']}** : {c['recent_posts']} posts récents (momentum {c['momentum']:+.2f})")
+    else:
+        lines.append("- (aucune)")
+    return lines
+
+def build_report_md(agg, opportunities, trends=None):
     now = datetime.now().strftime("%Y-%m-%d %H:%M")
-    total = len(df)
+    total = agg["posts"]
 
-    top = df.sort_values("engagement_score", ascending=False).head(10)
-    cat_counts = explode_counts(df, "categories")
-    fmt_counts = explode_counts(df, "formats")
+    top = agg["top"].head(TOP_POSTS)
+    cat_counts = agg["categories"]
+    fmt_counts = agg["formats"]
 
-    comp_themes = competitor_theme_matrix(df)
-    comp_formats = competitor_format_matrix(df)
+    comp_themes = agg["competitor_themes"]
+    comp_formats = agg["competitor_formats"]
 
     lines = []
     lines.append("# Inosearch España — Veille & Analyse (V0.1)")
@@ -241,7 +706,11 @@ def build_report_md(df, opportunities):
         lines.append(f"| {i} | {row.platform} | {row.competitor} | {row.date} | {cats} | {fmts} | {score} | {snippet} |")
     lines.append("")
 
-    lines.append("## 8) Recommandations Inosearch (première passe)")
+    lines.append(f"## 8) Tendances ({TREND_RECENT_WEEKS} dernières semaines vs {TREND_BASELINE_WEEKS} précédentes)")
+    lines.extend(trend_lines(trends))
+    lines.append("")
+
+    lines.append("## 9) Recommandations Inosearch (première passe)")
     lines.append("- Construire une série 'audit-ready' : périmètre, conditions, preuves, erreurs fréquentes.")
     lines.append("- Systématiser un CTA discret : diagnostic 20 min / pré-qualification I+D vs IT.")
     lines.append("- Réutiliser le même sujet en 2 versions : LinkedIn (long) + X (thread).")
@@ -249,24 +718,68 @@ def build_report_md(df, opportunities):
 
     return "\n".join(lines)
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify posts and build report.md / brief.json")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every post, ignoring data/cache/analysis.sqlite")
+    parser.add_argument("--stream", action="store_true", help="read posts.csv in chunks: memory bounded by --chunksize")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help=f"rows per chunk with --stream (default {CHUNKSIZE})")
+    parser.add_argument("--profile", action="store_true", help="cProfile each stage into reports/profile/")
+    args = parser.parse_args(argv)
+
+    metrics.enable_profiling(args.profile)
+    try:
+        run(use_cache=not args.no_cache, chunksize=args.chunksize if args.stream else None)
+    finally:
+        metrics.emit("analyze")
+
+def run(use_cache: bool = True, df=None, chunksize: int | None = None) -> dict:
+    """
+    Writes report.md and brief.json. `df`: posts already loaded by the
+    caller (load_posts()); `chunksize`: stream posts.csv instead (see
+    stream_aggregate), no frame is returned then. Returns the classified
+    frame and the brief, for the steps that follow in the same process.
+    """
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
     cfg = load_config()
-    df = load_posts()
-    df = assign_categories(df, cfg)
-    df = assign_formats(df, cfg)
-    df = score_engagement(df)
-
-    opportunities = compute_opportunities(df)
-
-    report_md = build_report_md(df, opportunities)
-    (REPORTS_DIR / "report.md").write_text(report_md, encoding="utf-8")
-
-    brief = build_brief_json(df, opportunities)
-    (REPORTS_DIR / "brief.json").write_text(json.dumps(brief, ensure_ascii=False, indent=2), encoding="utf-8")
+    if chunksize and df is None:
+        t0 = time.perf_counter()
+        with metrics.stage("stream"):
+            agg, rollups = stream_aggregate(cfg, chunksize, use_cache=use_cache)
+        metrics.gauge("posts", agg["posts"])
+        if agg["posts"]:
+            metrics.gauge("classify.rows_per_sec", round(agg["posts"] / (time.perf_counter() - t0), 1))
+        with metrics.stage("aggregate"):
+            opportunities = compute_opportunities(agg)
+        with metrics.stage("trends"):
+            trends = compute_trends(rollups)
+    else:
+        if df is None:
+            with metrics.stage("load"):
+                df = load_posts()
+        metrics.gauge("posts", len(df))
+
+        t0 = time.perf_counter()
+        with metrics.stage("classify"):
+            df = classify(df, cfg, use_cache=use_cache)
+        if len(df):
+            metrics.gauge("classify.rows_per_sec", round(len(df) / (time.perf_counter() - t0), 1))
+
+        with metrics.stage("aggregate"):
+            agg = aggregate(df)
+            opportunities = compute_opportunities(agg)
+        with metrics.stage("trends"):
+            trends = compute_trends(weekly_rollups(df, cfg, use_cache=use_cache))
+    with metrics.stage("render"):
+        report_md = build_report_md(agg, opportunities, trends)
+        brief = build_brief_json(agg, opportunities, trends)
+
+    with metrics.stage("write"):
+        (REPORTS_DIR / "report.md").write_text(report_md, encoding="utf-8")
+        (REPORTS_DIR / "brief.json").write_text(json.dumps(brief, ensure_ascii=False, indent=2), encoding="utf-8")
 
     print(f"OK — Rapport généré : {REPORTS_DIR / 'report.md'}")
     print(f"OK — Brief généré : {REPORTS_DIR / 'brief.json'}")
+    return {"df": df, "brief": brief}
 
 if __name__ == "__main__":
     main()
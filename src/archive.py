@@ -0,0 +1,98 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+ROOT = Path(__file__).resolve().parents[1]
+# under data/cache: git-ignored, kept between runs by the workflow cache
+ARCHIVE_DIR = ROOT / "data" / "cache" / "archive"
+LEGACY_DIR = ROOT / "data" / "archive"
+BLOBS_DIR = ARCHIVE_DIR / "blobs"
+INDEX_PATH = ARCHIVE_DIR / "index.jsonl"
+
+_lock = threading.Lock()
+_kept = None  # digests of "ok" pages, loaded on first discard()
+
+def migrate_legacy():
+    # one-time move out of the committed data/ tree
+    if LEGACY_DIR.exists() and not ARCHIVE_DIR.exists():
+        ARCHIVE_DIR.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(LEGACY_DIR, ARCHIVE_DIR)
+        print(f"[archive] moved {LEGACY_DIR} to {ARCHIVE_DIR}")
+
+def blob_path(digest: str) -> Path:
+    return BLOBS_DIR / digest[:2] / f"{digest}.gz"
+
+def put(body: bytes) -> str:
+    """
+    Stores a raw response body once, gzip-compressed, under its sha256.
+    Returns the digest.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    path = blob_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        # mtime=0 keeps the blob bytes a pure function of the body
+        tmp.write_bytes(gzip.compress(body, compresslevel=9, mtime=0))
+        os.replace(tmp, path)
+    return digest
+
+def get(digest: str) -> bytes:
+    return gzip.decompress(blob_path(digest).read_bytes())
+
+def has(digest: str) -> bool:
+    return blob_path(digest).exists()
+
+def discard(digest: str):
+    """
+    Drops a body not worth keeping (low content, duplicate), unless a
+    page recorded as ok has the very same body.
+    """
+    global _kept
+    with _lock:
+        if _kept is None:
+            _kept = {rec["sha256"] for rec in load_index().values() if rec.get("status") == "ok"}
+        if digest not in _kept:
+            blob_path(digest).unlink(missing_ok=True)
+
+def record(url: str, digest: str, competitor: str, status: str, **extra):
+    """
+    Appends one fetch to the index (a later line for the same URL wins).
+    """
+    rec = {
+        "url": url,
+        "sha256": digest,
+        "competitor": competitor,
+        "status": status,
+        "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **extra,
+    }
+    with _lock:
+        if status == "ok" and _kept is not None:
+            _kept.add(digest)
+        INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(INDEX_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+def load_index() -> dict:
+    """
+    url -> latest index record.
+    """
+    out = {}
+    if not INDEX_PATH.exists():
+        return out
+    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            out[rec["url"]] = rec
+    return out
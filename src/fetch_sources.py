@@ -1,79 +1,293 @@
 import re
+import csv
+import argparse
+import os
 import json
-import time
+import threading
+import queue as queue_mod
 import gzip
-import io
+import hashlib
+import time
 from pathlib import Path
+from functools import lru_cache
+from urllib.parse import parse_qsl, urljoin, urlsplit
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import xml.etree.ElementTree as ET
 
 import yaml
-import requests
-import pandas as pd
-from bs4 import BeautifulSoup
-import trafilatura
+
+import archive
+import http_client
+import http_cache
+import metrics
+import search
+import textnorm
+from scheduler import BudgetExceeded, SourceBudget, base_url_of, by_priority, is_due, priority_of, schedule_error
+from seen_store import SeenStore, canonical_url
+from simhash import FingerprintIndex, simhash
+import work_queue
+from work_queue import WorkQueue
 
 ROOT = Path(__file__).resolve().parents[1]
 CFG_PATH = ROOT / "config" / "sources.yaml"
-SEEN_PATH = ROOT / "data" / "seen_urls.json"
+SEEN_PATH = ROOT / "data" / "seen_urls.jsonl"
 POSTS_PATH = ROOT / "data" / "posts.csv"
+POSTS_COLUMNS = ["platform","competitor","author","date","url","content","likes","comments","reposts","content_norm"]
+STATE_PATH = ROOT / "data" / "crawl_state.json"
+# batch being appended to posts.csv (offset + URLs), removed once marked seen
+CHECKPOINT_PATH = ROOT / "data" / "cache" / "checkpoint.json"
+
+# lastmod values are only as precise as the publisher makes them
+LASTMOD_MARGIN = timedelta(days=1)
 
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; InosearchIntelBot/0.2.1; +https://inosearch.fr)"
 }
 
-def load_sources():
+MAX_WORKERS = 8
+MIN_CONTENT_CHARS = 200
+PROCESS_POOL_MIN = 50
+CHECKPOINT_EVERY = 20
+# list pages followed through rel="next" per source and run (sources.yaml max_pages)
+LIST_MAX_PAGES = 5
+# query keys that page or filter a list rather than point to an article
+LIST_PARAMS = {"page", "paged", "pg", "pagina", "offset", "start", "sort", "order", "orderby"}
+
+def load_config():
     with open(CFG_PATH, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
-    return cfg.get("sources", [])
+        return yaml.safe_load(f) or {}
 
-def load_seen():
-    if SEEN_PATH.exists():
-        return set(json.loads(SEEN_PATH.read_text(encoding="utf-8")))
-    return set()
+def load_sources():
+    return load_config().get("sources", [])
 
-def save_seen(seen: set[str]):
-    SEEN_PATH.write_text(json.dumps(sorted(seen), ensure_ascii=False, indent=2), encoding="utf-8")
+def configure_crawl(cfg: dict) -> tuple[int, int | None]:
+    """
+    Applies the optional `crawl:` section of sources.yaml to the shared host gate.
+    Returns (download threads, extraction processes or None for all cores).
+    """
+    crawl = cfg.get("crawl", {}) or {}
+    gate = http_client.GATE
+    gate.concurrency = int(crawl.get("host_concurrency", gate.concurrency))
+    gate.delay = float(crawl.get("host_delay", gate.delay))
+    for src in cfg.get("sources", []):
+        if "host_concurrency" in src or "host_delay" in src:
+            gate.configure(
+                http_client.host_of(src["url"]),
+                concurrency=src.get("host_concurrency"),
+                delay=src.get("host_delay"),
+            )
+    http_client.MAX_RETRIES = int(crawl.get("max_retries", http_client.MAX_RETRIES))
+    http_client.BREAKER.threshold = int(crawl.get("breaker_threshold", http_client.BREAKER.threshold))
+    http_cache.TTL.update(crawl.get("cache_ttl", {}) or {})
+    cpu_workers = crawl.get("cpu_workers")
+    return int(crawl.get("max_workers", MAX_WORKERS)), int(cpu_workers) if cpu_workers is not None else None
+
+def load_seen() -> SeenStore:
+    return SeenStore(SEEN_PATH)
+
+def save_seen(seen: SeenStore):
+    # records are written through on add(); this only closes (and maybe compacts) the log
+    seen.close()
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def load_crawl_state() -> dict:
+    if STATE_PATH.exists():
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    return {}
+
+def save_crawl_state(state: dict):
+    STATE_PATH.write_text(json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+
+def last_success(state: dict, source_name: str) -> datetime | None:
+    ts = state.get("last_success", {}).get(source_name)
+    dt = parse_lastmod(ts)
+    return dt - LASTMOD_MARGIN if dt else None
 
 def ensure_posts_csv():
     if not POSTS_PATH.exists():
-        df = pd.DataFrame(columns=[
-            "platform","competitor","author","date","url","content","likes","comments","reposts"
-        ])
-        df.to_csv(POSTS_PATH, index=False)
+        with open(POSTS_PATH, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(POSTS_COLUMNS)
+        return
+    header = posts_header()
+    if "content_norm" not in header:
+        # one-time migration: the normalized text is now stored at ingest
+        with open(POSTS_PATH, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            row["content_norm"] = textnorm.normalize(row.get("content") or "")
+        write_posts(rows, header + ["content_norm"])
+        print(f"[fetch] posts.csv: content_norm column added ({len(rows)} rows)")
+
+def posts_header() -> list[str]:
+    with open(POSTS_PATH, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), POSTS_COLUMNS)
 
 def append_posts(rows: list[dict]):
+    """
+    True append: cost is proportional to the new rows only, and the
+    committed CSV only grows at its end.
+    """
     if not rows:
         return
-    df_new = pd.DataFrame(rows)
-    df_old = pd.read_csv(POSTS_PATH)
-    df_all = pd.concat([df_old, df_new], ignore_index=True)
-    df_all.to_csv(POSTS_PATH, index=False)
-
-def fetch_bytes(url: str) -> bytes:
-    r = requests.get(url, headers=DEFAULT_HEADERS, timeout=30)
+    header = posts_header()
+    with open(POSTS_PATH, "rb+") as f:
+        # a hand-edited file may lack the final newline
+        f.seek(0, 2)
+        if f.tell() > 0:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    with open(POSTS_PATH, "a", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=header, extrasaction="ignore", lineterminator="\n")
+        w.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
+def begin_checkpoint(urls: list[str]):
+    # written (and synced) before the rows: see recover_checkpoint
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CHECKPOINT_PATH.with_name(CHECKPOINT_PATH.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"offset": POSTS_PATH.stat().st_size, "urls": urls}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CHECKPOINT_PATH)
+
+def recover_checkpoint(seen: SeenStore, queue: WorkQueue):
+    """
+    Finishes the checkpoint an interrupted run left between appending its
+    rows to posts.csv and marking them seen/done. If every row of the batch
+    is in posts.csv, they are marked now (not fetched and appended again);
+    a torn append is cut off and its URLs stay unfinished.
+    """
+    if not CHECKPOINT_PATH.exists():
+        return
+    marker = json.loads(CHECKPOINT_PATH.read_text(encoding="utf-8"))
+    offset, urls = marker["offset"], marker["urls"]
+    header = posts_header()
+    with open(POSTS_PATH, "rb") as f:
+        f.seek(offset)
+        tail = f.read().decode("utf-8", errors="replace")
+    try:
+        rows = list(csv.DictReader(tail.splitlines(keepends=True), fieldnames=header, strict=True))
+    except csv.Error:
+        rows = None
+    if rows is not None and tail.endswith("\n") and [r.get("url") for r in rows] == urls:
+        for row in rows:
+            seen.add(row["url"], status="ok", content_hash=content_hash(row.get("content") or ""))
+            if row["url"] in queue.items:
+                queue.mark(row["url"], work_queue.DONE)
+        seen.flush()
+        queue.flush()
+        print(f"[fetch] Interrupted checkpoint: {len(rows)} rows already in posts.csv marked seen")
+    else:
+        with open(POSTS_PATH, "rb+") as f:
+            f.truncate(offset)
+        print(f"[warn] Interrupted checkpoint: partial rows cut from posts.csv, {len(urls)} URLs fetched again")
+    CHECKPOINT_PATH.unlink()
+
+def write_posts(rows: list[dict], header: list[str]):
+    # full rewrite, only for offline rebuilds (--reextract)
+    tmp = POSTS_PATH.with_name(POSTS_PATH.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=header, extrasaction="ignore", lineterminator="\n")
+        w.writeheader()
+        w.writerows(rows)
+    os.replace(tmp, POSTS_PATH)
+
+def fetch_cached(url: str, kind: str) -> Path:
+    """
+    Conditional GET through the on-disk HTTP cache (data/cache/http).
+    Returns the path of the cached body; on 304 the stored body is reused.
+    """
+    entry = http_cache.lookup(url)
+    if http_cache.is_fresh(entry, kind):
+        metrics.incr("http_cache.lookups", kind=kind, result="fresh")
+        return http_cache.body_path(url)
+
+    headers = dict(DEFAULT_HEADERS)
+    headers.update(http_cache.conditional_headers(entry))
+    r = http_client.get(url, headers=headers, stream=True)
+    with r:
+        if r.status_code == 304 and entry:
+            metrics.incr("http_cache.lookups", kind=kind, result="not_modified")
+            http_cache.touch(url, entry, r.headers)
+            return http_cache.body_path(url)
+        r.raise_for_status()
+        metrics.incr("http_cache.lookups", kind=kind, result="miss")
+        path = http_cache.store(url, r.headers, r.iter_content(64 * 1024))
+        metrics.incr("http.bytes", path.stat().st_size, host=http_client.host_of(url))
+        return path
+
+def fetch_bytes(url: str, kind: str | None = None) -> bytes:
+    """
+    kind: "list" | "robots" | "sitemap" to go through the HTTP cache,
+    None for one-off resources (articles).
+    """
+    if kind is not None:
+        return fetch_cached(url, kind).read_bytes()
+    r = http_client.get(url, headers=DEFAULT_HEADERS)
     r.raise_for_status()
+    metrics.incr("http.bytes", len(r.content), host=http_client.host_of(url))
     return r.content
 
-def fetch_text(url: str) -> str:
-    return fetch_bytes(url).decode("utf-8", errors="replace")
-
-def extract_links_from_list(html: str, include_regex: str, base_url: str) -> list[str]:
-    soup = BeautifulSoup(html, "lxml")
-    pattern = re.compile(include_regex)
-    links = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"].strip()
-        if href.startswith("/"):
-            href = base_url.rstrip("/") + href
-        if pattern.match(href):
-            links.append(href.split("#")[0])
-    # de-dup preserving order
-    out, seen = [], set()
-    for u in links:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
-    return out
+def fetch_text(url: str, kind: str | None = None) -> str:
+    return fetch_bytes(url, kind).decode("utf-8", errors="replace")
+
+@lru_cache(maxsize=128)
+def url_pattern(regex: str) -> re.Pattern:
+    # include_url_regex is matched against every link of every page of a source
+    return re.compile(regex)
+
+def parse_list_page(html: str, include_regex: str, page_url: str) -> tuple[list[str], str | None]:
+    """
+    One lxml pass over a list page. Returns the links matching
+    include_regex, resolved with urljoin against the page URL (or its
+    <base href>), fragment dropped, de-duplicated in document order, and
+    the rel="next" page (<a> or <link>) if any. rel="next"/"prev" targets
+    and links back to the list itself (same path, query made only of
+    LIST_PARAMS or of the list URL's own keys) are not article links.
+    """
+    # lxml is only imported by runs that read list pages
+    import lxml.html
+    if not html or not html.strip():
+        return [], None
+    pattern = url_pattern(include_regex)
+    page = urlsplit(page_url)
+    list_url = f"{page.scheme}://{page.netloc}{page.path}".rstrip("/")
+    list_keys = LIST_PARAMS | {k for k, _ in parse_qsl(page.query)}
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    doc = lxml.html.document_fromstring(html.encode("utf-8"), parser=parser)
+    base = page_url
+    base_el = doc.find(".//base[@href]")
+    if base_el is not None:
+        base = urljoin(page_url, base_el.get("href").strip())
+    links, nav, next_url = {}, set(), None
+    for el in doc.iter("a", "link"):
+        href = el.get("href")
+        if not href:
+            continue
+        url = urljoin(base, href.strip()).split("#")[0]
+        rel = (el.get("rel") or "").lower().split()
+        if "next" in rel or "prev" in rel:
+            nav.add(url)
+            if next_url is None and "next" in rel:
+                next_url = url
+            continue
+        if el.tag != "a" or url in links or not pattern.match(url):
+            continue
+        path, _, query = url.partition("?")
+        if path.rstrip("/") == list_url and all(k in list_keys for k, _ in parse_qsl(query)):
+            continue
+        links[url] = None
+    return [u for u in links if u not in nav], next_url
+
+def extract_links_from_list(html: str, include_regex: str, page_url: str) -> list[str]:
+    return parse_list_page(html, include_regex, page_url)[0]
 
 def discover_sitemaps(base_url: str) -> list[str]:
     """
@@ -86,7 +300,7 @@ def discover_sitemaps(base_url: str) -> list[str]:
     # 1) robots.txt
     robots_url = base_url.rstrip("/") + "/robots.txt"
     try:
-        txt = fetch_text(robots_url)
+        txt = fetch_text(robots_url, kind="robots")
         for line in txt.splitlines():
             if line.lower().startswith("sitemap:"):
                 sm = line.split(":", 1)[1].strip()
@@ -107,167 +321,701 @@ def discover_sitemaps(base_url: str) -> list[str]:
             out.append(u)
     return out
 
-def parse_sitemap_urls(sitemap_url: str, max_urls: int = 5000) -> list[str]:
+def parse_lastmod(value: str | None) -> datetime | None:
     """
-    Supports sitemapindex and urlset, gz or plain xml.
-    Returns a list of URLs (loc).
+    W3C datetime (2026-01-10, 2026-01-10T08:00:00+01:00, ...Z) -> aware UTC datetime.
     """
+    if not value:
+        return None
     try:
-        content = fetch_bytes(sitemap_url)
-    except Exception:
-        return []
+        dt = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def open_sitemap(path: Path):
+    """
+    Opens a cached sitemap body, gunzipping on the fly when it is gzip-compressed
+    (detected from the magic bytes, not the URL suffix).
+    """
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
 
-    # gunzip if needed
-    if sitemap_url.endswith(".gz"):
-        try:
-            content = gzip.GzipFile(fileobj=io.BytesIO(content)).read()
-        except Exception:
-            return []
+def _strip_ns(tag: str) -> str:
+    return tag.split("}", 1)[-1] if "}" in tag else tag
+
+def _iter_sitemap_xml(f):
+    """
+    Streaming parse: yields (kind, loc, lastmod) with kind "sitemap" (from a
+    sitemapindex) or "url" (from a urlset). Processed elements are cleared
+    so memory stays flat whatever the sitemap size.
+    """
+    root = None
+    depth = 0
+    loc, lastmod = "", None
+    for event, el in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = el
+            continue
+        depth -= 1
+        tag = _strip_ns(el.tag)
+        # only direct children of <url>/<sitemap> (ignores image:loc, video:loc...)
+        if depth == 2 and tag == "loc":
+            loc = (el.text or "").strip()
+        elif depth == 2 and tag == "lastmod":
+            lastmod = (el.text or "").strip()
+        elif depth == 1 and tag in ("url", "sitemap"):
+            if loc:
+                yield tag, loc, lastmod
+            loc, lastmod = "", None
+            root.clear()
+
+def iter_sitemap_entries(sitemap_url: str, since: datetime | None = None,
+                         stats: dict | None = None, _visited: set | None = None):
+    """
+    Supports sitemapindex and urlset, gz or plain xml.
+    Lazily yields (loc, lastmod) pairs. When `since` is given, sub-sitemaps and
+    URLs whose lastmod is older are skipped (entries without lastmod are kept).
+    """
+    visited = _visited if _visited is not None else set()
+    if sitemap_url in visited:
+        return
+    visited.add(sitemap_url)
+    if stats is None:
+        stats = {}
 
     try:
-        root = ET.fromstring(content)
+        path = fetch_cached(sitemap_url, "sitemap")
     except Exception:
-        return []
-
-    # Handle namespaces
-    def strip_ns(tag: str) -> str:
-        return tag.split("}", 1)[-1] if "}" in tag else tag
+        return
 
-    tag = strip_ns(root.tag)
+    children = []
+    try:
+        with open_sitemap(path) as f:
+            for kind, loc, lastmod in _iter_sitemap_xml(f):
+                modified = parse_lastmod(lastmod)
+                if since is not None and modified is not None and modified < since:
+                    stats["skipped"] = stats.get("skipped", 0) + 1
+                    continue
+                if kind == "sitemap":
+                    # recurse once this file is closed
+                    children.append(loc)
+                else:
+                    yield loc, lastmod
+    except Exception:
+        pass
 
-    urls = []
-    if tag == "sitemapindex":
-        # recurse into sub-sitemaps
-        for sm in root.findall(".//{*}sitemap/{*}loc"):
-            loc = sm.text.strip() if sm.text else ""
-            if loc:
-                urls.extend(parse_sitemap_urls(loc, max_urls=max_urls))
-            if len(urls) >= max_urls:
-                break
-    elif tag == "urlset":
-        for loc_el in root.findall(".//{*}url/{*}loc"):
-            loc = loc_el.text.strip() if loc_el.text else ""
-            if loc:
-                urls.append(loc)
-            if len(urls) >= max_urls:
-                break
+    for child in children:
+        yield from iter_sitemap_entries(child, since=since, stats=stats, _visited=visited)
 
-    # de-dup
+def parse_sitemap_urls(sitemap_url: str, max_urls: int = 5000, since: datetime | None = None) -> list[str]:
+    """
+    Returns a de-duplicated list of URLs (loc), see iter_sitemap_entries.
+    """
     out, seen = [], set()
-    for u in urls:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
+    for loc, _ in iter_sitemap_entries(sitemap_url, since=since):
+        if loc not in seen:
+            seen.add(loc)
+            out.append(loc)
+            if len(out) >= max_urls:
+                break
     return out
 
-def links_from_sitemap(base_url: str, include_regex: str) -> list[str]:
-    pattern = re.compile(include_regex)
-    candidates = []
-    for sm in discover_sitemaps(base_url):
-        urls = parse_sitemap_urls(sm)
-        for u in urls:
-            if pattern.match(u):
-                candidates.append(u.split("#")[0])
-        if candidates:
-            break  # stop at first sitemap source that yields results
-    # de-dup preserving order
+def links_from_sitemap(base_url: str, include_regex: str, since: datetime | None = None,
+                       max_urls: int = 5000) -> list[str]:
+    pattern = url_pattern(include_regex)
     out, seen = [], set()
-    for u in candidates:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
+    for sm in discover_sitemaps(base_url):
+        stats = {}
+        for loc, _ in iter_sitemap_entries(sm, since=since, stats=stats):
+            u = loc.split("#")[0]
+            if pattern.match(u) and u not in seen:
+                seen.add(u)
+                out.append(u)
+                if len(out) >= max_urls:
+                    break
+        if out or stats.get("skipped"):
+            break  # stop at first sitemap source that yields results (or is simply unchanged)
     return out
 
-def extract_article(url: str) -> dict:
-    html = fetch_text(url)
+def load_extractor():
+    # trafilatura (+ lxml, courlan, htmldate…) is the heaviest import here:
+    # only runs that extract pay for it. Called before a process pool is
+    # started so that the forked workers inherit the loaded modules.
+    import trafilatura
+    return trafilatura
+
+def parse_article(html: bytes | str) -> dict:
+    """
+    Single parse: one lxml tree feeds the title, the date metadata and trafilatura.
+    """
+    trafilatura = load_extractor()
+    tree = trafilatura.load_html(html)
+    if tree is None:
+        return {"title": "", "date": "", "content": ""}
 
-    downloaded = trafilatura.fetch_url(url)
-    if downloaded is None:
-        downloaded = html
+    # read metadata before extraction: trafilatura prunes the tree in place
+    title = (tree.findtext(".//title") or "").strip()
+    date_iso = ""
+    for xp in ('//meta[@property="article:published_time"]/@content', '//meta[@name="date"]/@content'):
+        values = [v for v in tree.xpath(xp) if v.strip()]
+        if values:
+            date_iso = values[0].strip()[:10]
+            break
 
-    extracted = trafilatura.extract(downloaded, include_comments=False, include_tables=False)
+    extracted = trafilatura.extract(tree, include_comments=False, include_tables=False)
     if extracted is None:
         extracted = ""
 
-    soup = BeautifulSoup(html, "lxml")
+    return {"title": title, "date": date_iso, "content": extracted.strip()}
 
-    title = soup.title.text.strip() if soup.title and soup.title.text else ""
-    date_iso = ""
+def timed_parse(html: bytes | str) -> tuple[dict, float]:
+    # process-pool entry point: extraction time is measured in the worker
+    # and observed by the parent, which owns the metrics
+    t0 = time.perf_counter()
+    art = parse_article(html)
+    return art, time.perf_counter() - t0
 
-    meta = soup.find("meta", attrs={"property": "article:published_time"})
-    if meta and meta.get("content"):
-        date_iso = meta["content"][:10]
-    if not date_iso:
-        meta = soup.find("meta", attrs={"name": "date"})
-        if meta and meta.get("content"):
-            date_iso = meta["content"][:10]
+def extract_article(url: str) -> dict:
+    # single download: the raw body goes straight to the parser
+    return parse_article(fetch_bytes(url))
 
-    return {"title": title, "date": date_iso, "content": extracted.strip()}
+def download_and_archive(url: str) -> tuple[bytes, str]:
+    # network stage: raw body + its digest in the archive
+    body = fetch_bytes(url)
+    return body, archive.put(body)
 
-def main():
-    sources = load_sources()
-    seen = load_seen()
-    ensure_posts_csv()
+def fetch_and_archive(url: str) -> dict:
+    """
+    extract_article that also keeps the raw body in the archive
+    (article["sha256"] points to the blob).
+    """
+    body, digest = download_and_archive(url)
+    with metrics.timed("extract.seconds"):
+        art = parse_article(body)
+    art["sha256"] = digest
+    return art
 
-    total_new = 0
+class Dispatcher:
+    """
+    Hands article URLs to the download threads only when they can start:
+    their host has a free slot in http_client.GATE and their limit(url)
+    group (key, cap or None) is under its cap. No pool thread then sits
+    blocked on a busy host or source while other hosts are idle.
+    tier(url), if given, orders the work within the free capacity (lowest
+    tier first); within a tier, hosts are taken round-robin.
+    """
 
-    for src in sources:
-        name = src["name"]
-        url = src["url"]
-        base_url = src.get("base_url", "https://leyton.com")
-        include_regex = src.get("include_url_regex", ".*")
-
-        print(f"[fetch] Source={name} type=html_list url={url}")
-
-        links = []
-        # 1) try HTML list
-        try:
-            list_html = fetch_text(url)
-            links = extract_links_from_list(list_html, include_regex, base_url)
-        except Exception as e:
-            print(f"[warn] Cannot fetch/parse list page: {e}")
-
-        # 2) fallback to sitemap if needed
-        if len(links) == 0:
-            print("[fetch] Found 0 candidate links via HTML list; trying sitemap fallback...")
-            links = links_from_sitemap(base_url, include_regex)
-
-        print(f"[fetch] Found {len(links)} candidate links")
-        new_links = [u for u in links if u not in seen]
-        print(f"[fetch] New links this run: {len(new_links)}")
-
-        rows = []
-        for u in new_links:
+    def __init__(self, urls: list[str], tier=None, limit=None):
+        self.lanes = defaultdict(dict)  # tier -> (host, group) -> URLs
+        self.caps = {}
+        self.group_of = {}
+        for u in urls:
+            group, cap = limit(u) if limit is not None else (None, None)
+            self.group_of[u] = group
+            if cap:
+                self.caps[group] = max(1, int(cap))
+            lane = self.lanes[tier(u) if tier is not None else 0].setdefault((http_client.host_of(u), group), deque())
+            lane.append(u)
+        self.host_busy = defaultdict(int)
+        self.group_busy = defaultdict(int)
+
+    def take(self, n: int) -> list[str]:
+        out = []
+        for t in sorted(self.lanes):
+            progress = True
+            while progress and len(out) < n:
+                progress = False
+                for (host, group), lane in self.lanes[t].items():
+                    if len(out) >= n:
+                        break
+                    if not lane or self.host_busy[host] >= http_client.GATE.concurrency_of(host):
+                        continue
+                    if group in self.caps and self.group_busy[group] >= self.caps[group]:
+                        continue
+                    out.append(lane.popleft())
+                    self.host_busy[host] += 1
+                    self.group_busy[group] += 1
+                    progress = True
+        return out
+
+    def done(self, url: str):
+        self.host_busy[http_client.host_of(url)] -= 1
+        self.group_busy[self.group_of[url]] -= 1
+
+def fetch_articles(urls: list[str], max_workers: int = MAX_WORKERS, on_start=None,
+                   cpu_workers: int | None = None, limit=None, tier=None):
+    """
+    Downloads (+ archives) and extracts articles concurrently.
+    Yields (url, article, error) as results complete; per-host politeness
+    (concurrency cap + min delay) is enforced by http_client.GATE.
+    on_start(url) is called from the worker right before the fetch (an
+    exception it raises is yielded as the URL's error). limit(url) and
+    tier(url): see Dispatcher, which decides what the workers take next.
+
+    Small batches are extracted in the download threads. From
+    PROCESS_POOL_MIN URLs on, extraction (CPU-bound, GIL-holding) moves to a
+    process pool of cpu_workers processes; at most 2 × cpu_workers bodies
+    wait for or sit in extraction, so downloads pause instead of piling up.
+    """
+    if not urls:
+        return
+    dispatcher = Dispatcher(urls, tier, limit)
+    n_hosts = len({http_client.host_of(u) for u in urls})
+    workers = max(1, min(max_workers, len(urls), n_hosts * http_client.GATE.concurrency))
+    cpu_workers = cpu_workers if cpu_workers is not None else (os.cpu_count() or 1)
+
+    if cpu_workers < 1 or len(urls) < PROCESS_POOL_MIN:
+        def job(u):
+            if on_start is not None:
+                on_start(u)
+            return fetch_and_archive(u)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while True:
+                for u in dispatcher.take(workers - len(running)):
+                    running[pool.submit(job, u)] = u
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                finished = [(running.pop(fut), fut) for fut in done]
+                for u, _ in finished:
+                    dispatcher.done(u)
+                # refill the pool before handing results to the caller
+                for u in dispatcher.take(workers - len(running)):
+                    running[pool.submit(job, u)] = u
+                for u, fut in finished:
+                    try:
+                        yield u, fut.result(), None
+                    except Exception as e:
+                        yield u, None, e
+        return
+
+    results = queue_mod.Queue()
+    slots = threading.BoundedSemaphore(2 * cpu_workers)
+
+    load_extractor()
+    with ProcessPoolExecutor(max_workers=cpu_workers) as cpu_pool:
+        # start the extraction processes before any download thread exists
+        cpu_pool.submit(int).result()
+
+        def extracted(u, digest, fut):
+            slots.release()
+            results.put((u, digest, fut))
+
+        def download(u):
             try:
-                art = extract_article(u)
-                content = art["content"]
-                if not content or len(content) < 200:
-                    print(f"[skip] Low content extracted for {u}")
-                    seen.add(u)
+                if on_start is not None:
+                    on_start(u)
+                body, digest = download_and_archive(u)
+                slots.acquire()
+                try:
+                    fut = cpu_pool.submit(timed_parse, body)
+                except Exception:
+                    slots.release()
+                    raise
+                fut.add_done_callback(lambda f: extracted(u, digest, f))
+            except Exception as e:
+                results.put((u, None, e))
+            # (u, None, None): the thread is free for another download
+            results.put((u, None, None))
+
+        with ThreadPoolExecutor(max_workers=workers) as net_pool:
+            downloading = 0
+            for u in dispatcher.take(workers):
+                net_pool.submit(download, u)
+                downloading += 1
+            left = len(urls)
+            while left:
+                u, digest, outcome = results.get()
+                if outcome is None:
+                    dispatcher.done(u)
+                    downloading -= 1
+                    for u in dispatcher.take(workers - downloading):
+                        net_pool.submit(download, u)
+                        downloading += 1
                     continue
+                left -= 1
+                if isinstance(outcome, Exception):
+                    yield u, None, outcome
+                    continue
+                try:
+                    art, seconds = outcome.result()
+                except Exception as e:
+                    yield u, None, e
+                    continue
+                metrics.observe("extract.seconds", seconds)
+                art["sha256"] = digest
+                yield u, art, None
 
-                rows.append({
-                    "platform": "web",
-                    "competitor": name,
-                    "author": "",
-                    "date": art["date"] or "",
-                    "url": u,
-                    "content": content,
-                    "likes": 0,
-                    "comments": 0,
-                    "reposts": 0,
-                })
-                seen.add(u)
-                total_new += 1
-                time.sleep(0.4)
+def discover(src: dict, seen: SeenStore, state: dict, outstanding: set | None = None) -> list[str]:
+    """
+    New article URLs of one source: HTML list page first, sitemap as fallback.
+    outstanding: its URLs the previous run left pending or failed, which
+    the list walk goes on looking for.
+    """
+    name = src["name"]
+    url = src["url"]
+    base_url = base_url_of(src)
+    include_regex = src.get("include_url_regex", ".*")
+
+    print(f"[fetch] Source={name} type=html_list url={url}")
+
+    # 1) try the HTML list, following rel="next" while pages bring new links
+    # (lists are newest first: a page with nothing new ends the walk, once
+    # every outstanding URL has been met again)
+    max_pages = int(src.get("max_pages", LIST_MAX_PAGES))
+    links, visited, page_url = {}, set(), url
+    left = set(outstanding or ())
+    try:
+        while page_url and page_url not in visited and len(visited) < max_pages:
+            visited.add(page_url)
+            page_links, page_url = parse_list_page(fetch_text(page_url, kind="list"), include_regex, page_url)
+            fresh = 0
+            for u in page_links:
+                if u not in links:
+                    links[u] = None
+                    fresh += u not in seen
+            left.difference_update(page_links)
+            if not fresh and not left:
+                break
+    except Exception as e:
+        print(f"[warn] {name}: Cannot fetch/parse list page: {e}")
+    metrics.incr("discovery.list_pages", len(visited), source=name)
+    links = list(links)
+
+    # 2) fallback to sitemap if needed
+    if len(links) == 0:
+        print(f"[fetch] {name}: Found 0 candidate links via HTML list; trying sitemap fallback...")
+        since = last_success(state, name)
+        if since:
+            print(f"[fetch] {name}: Sitemap entries older than {since.date()} are skipped")
+        links = links_from_sitemap(base_url, include_regex, since=since)
+
+    print(f"[fetch] {name}: Found {len(links)} candidate links")
+    new_links, keys = [], set()
+    for u in links:
+        key = canonical_url(u)
+        if key not in keys and u not in seen:
+            keys.add(key)
+            new_links.append(u)
+    print(f"[fetch] {name}: New links this run: {len(new_links)}")
+    return new_links
+
+def discover_all(sources: list[dict], seen: SeenStore, state: dict, max_workers: int = MAX_WORKERS,
+                 outstanding: dict | None = None) -> dict:
+    """
+    discover() of every source at once, one thread each: a slow list page
+    or sitemap only delays its own source (hosts stay polite through
+    http_client.GATE). Returns name -> new links, or None for a failed source.
+    """
+    outstanding = outstanding or {}
+
+    def job(src):
+        with metrics.timed("discovery.seconds", source=src["name"]):
+            return discover(src, seen, state, outstanding.get(src["name"]))
+
+    out = {}
+    if not sources:
+        return out
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources)))) as pool:
+        futures = {pool.submit(job, src): src["name"] for src in sources}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                out[name] = fut.result()
             except Exception as e:
-                print(f"[warn] Failed article {u}: {e}")
+                print(f"[warn] {name}: discovery failed: {e}")
+                out[name] = None
+    return out
 
-        append_posts(rows)
+def make_row(competitor: str, url: str, art: dict) -> dict:
+    return {
+        "platform": "web",
+        "competitor": competitor,
+        "author": "",
+        "date": art["date"] or "",
+        "url": url,
+        "content": art["content"],
+        "content_norm": textnorm.normalize(art["content"]),
+        "likes": 0,
+        "comments": 0,
+        "reposts": 0,
+    }
+
+def _parse_blob(digest: str) -> dict:
+    return parse_article(archive.get(digest))
+
+def reextract(workers: int | None = None) -> int:
+    """
+    Rebuilds the web rows of posts.csv from the raw HTML archive, in parallel
+    across cores and without network. Rows whose body is not in the archive
+    (manual posts, older crawls, evicted cache) are kept as they are;
+    low-content and duplicate bodies are not archived.
+    Returns the number of pages re-extracted.
+    """
+    archive.migrate_legacy()
+    index = {u: rec for u, rec in archive.load_index().items() if archive.has(rec["sha256"])}
+    todo = {u: rec for u, rec in index.items() if rec.get("status") != "duplicate"}
+    print(f"[reextract] {len(todo)} archived pages, {workers or os.cpu_count()} processes")
+    load_extractor()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = pool.map(_parse_blob, [rec["sha256"] for rec in todo.values()], chunksize=8)
+        arts = dict(zip(todo, parsed))
+
+    rebuilt = {}
+    for u, art in arts.items():
+        if art["content"] and len(art["content"]) >= MIN_CONTENT_CHARS:
+            rebuilt[u] = make_row(todo[u]["competitor"], u, art)
+
+    ensure_posts_csv()
+    header = posts_header()
+    rows = []
+    with open(POSTS_PATH, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            u = row.get("url") or ""
+            if u not in index:
+                rows.append(row)
+            elif u in rebuilt:
+                new = rebuilt.pop(u)
+                new["date"] = new["date"] or row.get("date", "")
+                rows.append({**row, **new})
+    n = len(rebuilt)
+    rows.extend(rebuilt.values())  # pages that only pass the content bar now
+    write_posts(rows, header)
+    search.sync(POSTS_PATH)
+    print(f"OK — posts.csv rebuilt from the archive: {len(arts)} pages re-extracted, {n} new rows")
+    return len(arts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Discover and fetch new competitor articles")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from its work queue instead of rediscovering")
+    parser.add_argument("--reextract", action="store_true",
+                        help="rebuild posts.csv from the raw HTML archive (no network)")
+    parser.add_argument("--workers", type=int, default=None, help="processes for --reextract (default: all cores)")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile each stage into reports/profile/")
+    args = parser.parse_args(argv)
+
+    metrics.enable_profiling(args.profile)
+    try:
+        if args.reextract:
+            with metrics.stage("reextract"):
+                reextract(args.workers)
+        else:
+            crawl(resume=args.resume)
+    finally:
+        metrics.emit("fetch_sources")
+
+def crawl(resume: bool = False):
+    """
+    One crawl: discovery of the sources that are due (or resume of the
+    work queue), all sources in parallel, then the articles, checkpointed
+    to posts.csv. Each source runs within its SourceBudget; higher
+    priority sources are discovered and fetched first.
+    Returns the number of rows appended.
+    """
+    cfg = load_config()
+    sources = cfg.get("sources", [])
+    max_workers, cpu_workers = configure_crawl(cfg)
+    seen = load_seen()
+    state = load_crawl_state()
+    queue = WorkQueue()
+    ensure_posts_csv()
+    recover_checkpoint(seen, queue)
+    archive.migrate_legacy()
+    # budgets start now: max_time covers discovery and articles
+    budgets = {src["name"]: SourceBudget(src) for src in sources}
+
+    capped = set()
+    if resume and queue.unfinished():
+        run_started = queue.run_started or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        print(f"[fetch] Resuming run started {run_started}: {len(queue.unfinished())} URLs left {queue.counts()}")
+        crawled = {rec.get("source") for rec in queue.items.values() if not rec.get("held")}
+        capped = {rec.get("source") for rec in queue.items.values() if rec.get("held") == "max_urls"}
+    else:
+        if resume:
+            print("[fetch] Nothing to resume; starting a new run")
+        # URLs the previous run left pending (max_urls overflow, max_time,
+        # source not due, interrupted run) are carried over, ahead of the
+        # newly discovered ones; with the failed ones, discovery keeps
+        # walking list pages until it meets them again
+        carried, outstanding = defaultdict(list), defaultdict(set)
+        for u, rec in queue.items.items():
+            if u in seen or rec.get("state") not in (work_queue.PENDING, work_queue.IN_FLIGHT, work_queue.FAILED):
+                continue
+            outstanding[rec.get("source")].add(u)
+            if rec.get("state") != work_queue.FAILED:
+                carried[rec.get("source")].append(u)
+        run_started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        queue.reset(run_started)
+        now = datetime.now(timezone.utc)
+        due = []
+        for src in by_priority(sources):
+            error = schedule_error(src)
+            last = parse_lastmod(state.get("last_crawl", {}).get(src["name"]))
+            if error:
+                print(f"[warn] {src['name']}: {error}; source skipped")
+                metrics.incr("sources", result="invalid")
+            elif is_due(src, last, now):
+                due.append(src)
+            else:
+                print(f"[skip] {src['name']}: {src['schedule']} schedule, last crawled {last.date()}")
+                metrics.incr("sources", result="not_due")
+        crawled = {src["name"] for src in due}
+        with metrics.stage("discovery"):
+            found = discover_all(due, seen, state, max_workers=max_workers, outstanding=outstanding)
+            for src in due:
+                name = src["name"]
+                links = found.get(name)
+                if links is None:
+                    # neither mark moves: the source is due again next run
+                    crawled.discard(name)
+                    metrics.incr("sources", result="failed")
+                    continue
+                metrics.incr("sources", result="due")
+                links = list(dict.fromkeys(carried.pop(name, []) + links))
+                kept = budgets[name].cap(links)
+                for u in links:
+                    queue.enqueue(u, name)
+                if len(kept) < len(links):
+                    # held in the queue: the next run picks them up first
+                    capped.add(name)
+                    for u in links[len(kept):]:
+                        queue.mark(u, work_queue.PENDING, held="max_urls")
+                    print(f"[fetch] {name}: max_urls reached, {len(links) - len(kept)} links left for the next run")
+                metrics.gauge("discovery.new_links", len(kept), source=name)
+            # sources not crawled this run keep their pending URLs
+            names = {src["name"] for src in sources}
+            for name, urls in carried.items():
+                if name in names:
+                    for u in urls:
+                        queue.enqueue(u, name)
+                        queue.mark(u, work_queue.PENDING, held="not_crawled")
+            queue.flush()
+
+    # articles of all sources, fetched concurrently; rows are checkpointed
+    # to posts.csv (then marked done/seen) every CHECKPOINT_EVERY articles
+    fingerprints = FingerprintIndex()
+    source_rank = {src["name"]: i for i, src in enumerate(sources)}
+    discovery_rank = {u: i for i, u in enumerate(queue.items)}
+    buffer = []
+    total_new = 0
+
+    def checkpoint():
+        nonlocal total_new
+        buffer.sort(key=lambda b: (source_rank.get(b[1]["competitor"], len(source_rank)), discovery_rank.get(b[0], 0)))
+        if buffer:
+            begin_checkpoint([u for u, _, _ in buffer])
+            append_posts([row for _, row, _ in buffer])
+        for u, _, h in buffer:
+            seen.add(u, status="ok", content_hash=h)
+            queue.mark(u, work_queue.DONE)
+        total_new += len(buffer)
+        seen.flush()
+        queue.flush()
+        if buffer:
+            CHECKPOINT_PATH.unlink()
+        buffer.clear()
+
+    priority = {src["name"]: priority_of(src) for src in sources}
+    # a kill between seen.add and queue.flush leaves checkpointed URLs
+    # unfinished in the queue: close them instead of fetching them again
+    done_states = {"low_content": work_queue.LOW_CONTENT, "duplicate": work_queue.DUPLICATE}
+    for u in queue.unfinished():
+        if u in seen:
+            queue.mark(u, done_states.get(seen.get(u).get("status"), work_queue.DONE))
+    todo = [u for u in queue.unfinished() if not queue.items[u].get("held")]
+    deferred = defaultdict(int)
+
+    def budget_of(u):
+        return budgets.get(queue.source_of(u)) or SourceBudget()
+
+    def on_start(u):
+        budget_of(u).check()
+        queue.mark(u, work_queue.IN_FLIGHT)
+
+    t0 = time.perf_counter()
+    with metrics.stage("articles"):
+        for u, art, err in fetch_articles(todo, max_workers=max_workers, on_start=on_start,
+                                          cpu_workers=cpu_workers,
+                                          limit=lambda u: (queue.source_of(u), budget_of(u).max_concurrency),
+                                          tier=lambda u: -priority.get(queue.source_of(u), 0)):
+            name = queue.source_of(u)
+            if isinstance(err, BudgetExceeded):
+                # still pending: picked up by --resume or rediscovered next run
+                metrics.incr("articles", result="deferred")
+                queue.mark(u, work_queue.PENDING, deferred=str(err))
+                deferred[name] += 1
+                continue
+            if err is not None:
+                print(f"[warn] Failed article {u}: {err}")
+                metrics.incr("articles", result="failed")
+                queue.mark(u, work_queue.FAILED, error=str(err)[:200])
+                continue
+            content = art["content"]
+            if not content or len(content) < MIN_CONTENT_CHARS:
+                print(f"[skip] Low content extracted for {u}")
+                metrics.incr("articles", result="low_content")
+                seen.add(u, status="low_content", content_hash=content_hash(content or ""))
+                queue.mark(u, work_queue.LOW_CONTENT)
+                archive.record(u, art["sha256"], name, "low_content")
+                archive.discard(art["sha256"])
+                continue
+            fp = simhash(content)
+            dup = fingerprints.find(fp)
+            # after a crash the article's own fingerprint may already be indexed
+            if dup is not None and canonical_url(dup) != canonical_url(u):
+                print(f"[skip] Near-duplicate of {dup or '(manual post)'}: {u}")
+                metrics.incr("articles", result="duplicate")
+                seen.add(u, status="duplicate", content_hash=content_hash(content), duplicate_of=dup)
+                queue.mark(u, work_queue.DUPLICATE, duplicate_of=dup)
+                archive.record(u, art["sha256"], name, "duplicate", duplicate_of=dup)
+                archive.discard(art["sha256"])
+                continue
+            if dup is None:
+                fingerprints.add(u, fp)
+            archive.record(u, art["sha256"], name, "ok")
+            metrics.incr("articles", result="ok")
+            buffer.append((u, make_row(name, u, art), content_hash(content)))
+            if len(buffer) >= CHECKPOINT_EVERY:
+                checkpoint()
+        checkpoint()
+    if todo:
+        metrics.gauge("articles_per_sec", round(len(todo) / (time.perf_counter() - t0), 2))
+
+    for name, n in deferred.items():
+        print(f"[fetch] {name}: max_time reached, {n} articles left for the next run")
 
     save_seen(seen)
-    print(f"OK — New items appended: {total_new}")
+    queue.close()
+
+    # a source with failed, deferred or capped articles keeps its previous
+    # mark so that the next sitemap pass still sees those URLs
+    failed_sources = {rec.get("source") for rec in queue.items.values() if rec.get("state") == work_queue.FAILED}
+    failed_sources |= set(deferred) | capped
+    for src in sources:
+        if src["name"] not in crawled:
+            continue
+        state.setdefault("last_crawl", {})[src["name"]] = run_started
+        if src["name"] not in failed_sources:
+            state.setdefault("last_success", {})[src["name"]] = run_started
+    save_crawl_state(state)
+    with metrics.stage("search_index"):
+        search.sync(POSTS_PATH)
+
+    print(f"OK — New items appended: {total_new} {queue.counts()}")
     print(f"OK — Seen URLs stored: {SEEN_PATH}")
+    return total_new
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "data" / "cache" / "http"
+
+# Freshness per resource type, in seconds. Within the TTL the cached body is
+# served without any request; past it, the entry is revalidated with
+# If-None-Match / If-Modified-Since. 0 = always revalidate.
+TTL = {
+    "list": 0,
+    "robots": 6 * 86400,
+    "sitemap": 0,
+}
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+def body_path(url: str) -> Path:
+    k = _key(url)
+    return CACHE_DIR / k[:2] / f"{k}.body"
+
+def _meta_path(url: str) -> Path:
+    k = _key(url)
+    return CACHE_DIR / k[:2] / f"{k}.json"
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def lookup(url: str) -> dict | None:
+    meta = _meta_path(url)
+    if not meta.exists() or not body_path(url).exists():
+        return None
+    try:
+        return json.loads(meta.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+def is_fresh(entry: dict | None, kind: str) -> bool:
+    if not entry:
+        return False
+    ttl = TTL.get(kind, 0)
+    return ttl > 0 and time.time() - entry.get("stored_at", 0) < ttl
+
+def conditional_headers(entry: dict | None) -> dict:
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+def _write_meta(url: str, entry: dict):
+    _write_atomic(_meta_path(url), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+def touch(url: str, entry: dict, headers=None) -> dict:
+    """
+    Called on 304: the body is still valid, only validators/timestamps move.
+    """
+    entry = dict(entry)
+    if headers is not None:
+        entry["etag"] = headers.get("ETag") or entry.get("etag")
+        entry["last_modified"] = headers.get("Last-Modified") or entry.get("last_modified")
+    entry["stored_at"] = time.time()
+    _write_meta(url, entry)
+    return entry
+
+def store(url: str, headers, chunks) -> Path:
+    """
+    Streams `chunks` (an iterable of bytes) to disk, then records the validators.
+    """
+    path = body_path(url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    size = 0
+    with open(tmp, "wb") as f:
+        for chunk in chunks:
+            if chunk:
+                f.write(chunk)
+                size += len(chunk)
+    os.replace(tmp, path)
+    _write_meta(url, {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "stored_at": time.time(),
+        "size": size,
+    })
+    return path
@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+HOST_CONCURRENCY = 2
+HOST_DELAY = 0.4
+
+TIMEOUT = (10, 30)  # connect, read
+MAX_RETRIES = 3
+RETRY_STATUS = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+BREAKER_THRESHOLD = 5  # consecutive failed requests (retries exhausted) before a host is given up for the run
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+class HostGate:
+    """
+    Per-host politeness:
+    - at most `concurrency` requests in flight on the same host
+    - at least `delay` seconds between two request starts on the same host
+    Different hosts never wait on each other.
+    """
+
+    def __init__(self, concurrency: int = HOST_CONCURRENCY, delay: float = HOST_DELAY):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._overrides = {}
+
+    def configure(self, host: str, concurrency: int | None = None, delay: float | None = None):
+        with self._lock:
+            self._overrides[host.lower()] = {
+                "concurrency": concurrency if concurrency is not None else self.concurrency,
+                "delay": delay if delay is not None else self.delay,
+            }
+            self._hosts.pop(host.lower(), None)
+
+    def concurrency_of(self, host: str) -> int:
+        return int(self._overrides.get(host, {}).get("concurrency", self.concurrency))
+
+    def _state(self, host: str) -> dict:
+        with self._lock:
+            st = self._hosts.get(host)
+            if st is None:
+                opts = self._overrides.get(host, {"concurrency": self.concurrency, "delay": self.delay})
+                st = {
+                    "sem": threading.BoundedSemaphore(max(1, int(opts["concurrency"]))),
+                    "lock": threading.Lock(),
+                    "delay": float(opts["delay"]),
+                    "next_start": 0.0,
+                }
+                self._hosts[host] = st
+            return st
+
+    def defer(self, url: str, seconds: float):
+        """
+        Pushes back the next request start on this host (429 / Retry-After).
+        """
+        st = self._state(host_of(url))
+        with st["lock"]:
+            st["next_start"] = max(st["next_start"], time.monotonic() + seconds)
+
+    @contextmanager
+    def slot(self, url: str):
+        st = self._state(host_of(url))
+        st["sem"].acquire()
+        try:
+            # Holding the host lock while sleeping spaces out request starts.
+            with st["lock"]:
+                wait = st["next_start"] - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                st["next_start"] = time.monotonic() + st["delay"]
+            yield
+        finally:
+            st["sem"].release()
+
+class CircuitBreaker:
+    """
+    Counts consecutive failed requests per host: a request fails once its
+    retries are exhausted (connection errors, timeouts, 429/5xx), however
+    many attempts that took. Past the threshold the host stays open for the
+    rest of the run: further requests fail fast with CircuitOpenError
+    instead of waiting on timeouts.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._open = set()
+
+    def is_open(self, host: str) -> bool:
+        return host in self._open
+
+    def success(self, host: str):
+        with self._lock:
+            self._failures[host] = 0
+
+    def failure(self, host: str):
+        with self._lock:
+            n = self._failures.get(host, 0) + 1
+            self._failures[host] = n
+            if n >= self.threshold and host not in self._open:
+                self._open.add(host)
+                metrics.incr("http.breaker_open", host=host)
+                print(f"[warn] {host}: {n} consecutive failed requests, skipping this host for the rest of the run")
+
+GATE = HostGate()
+BREAKER = CircuitBreaker()
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def session_for(host: str) -> requests.Session:
+    """
+    One keep-alive Session per host, its pool sized to the host's concurrency.
+    """
+    with _sessions_lock:
+        s = _sessions.get(host)
+        if s is None:
+            s = requests.Session()
+            size = max(1, GATE.concurrency_of(host))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=0)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _sessions[host] = s
+        return s
+
+def retry_after(r: requests.Response) -> float | None:
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff(attempt: int) -> float:
+    # exponential with full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    Polite GET: per-host gate, pooled session, retries with jittered
+    exponential backoff on connection errors / timeouts / 429 / 5xx
+    (Retry-After honored up to BACKOFF_MAX), per-host circuit breaker
+    (one failure per request whose retries are exhausted).
+    After the last retry a 429/5xx response is returned as is.
+    """
+    host = host_of(url)
+    kwargs.setdefault("timeout", TIMEOUT)
+    attempt = 0
+    while True:
+        if BREAKER.is_open(host):
+            metrics.incr("http.short_circuited", host=host)
+            raise CircuitOpenError(f"circuit open for {host}")
+        if attempt:
+            metrics.incr("http.retries", host=host)
+        try:
+            with GATE.slot(url):
+                t0 = time.perf_counter()
+                r = session_for(host).get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.incr("http.requests", host=host, status=type(e).__name__)
+            if attempt >= MAX_RETRIES or BREAKER.is_open(host):
+                BREAKER.failure(host)
+                raise
+            delay = backoff(attempt)
+        else:
+            # time to response headers (streamed bodies are read by the caller)
+            metrics.observe("http.latency", time.perf_counter() - t0, host=host)
+            metrics.incr("http.requests", host=host, status=r.status_code)
+            if r.status_code not in RETRY_STATUS:
+                BREAKER.success(host)
+                return r
+            wait = retry_after(r)
+            if attempt >= MAX_RETRIES or BREAKER.is_open(host) or (wait or 0) > BACKOFF_MAX:
+                BREAKER.failure(host)
+                return r
+            r.close()
+            delay = max(wait or 0, backoff(attempt))
+            GATE.defer(url, delay)
+        attempt += 1
+        time.sleep(delay)
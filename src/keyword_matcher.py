@@ -0,0 +1,114 @@
+import re
+from collections import defaultdict
+
+def build_trie(words) -> dict:
+    # {char: {...}}, "" marks the end of a word
+    trie = {}
+    for w in words:
+        if not w:
+            continue
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return trie
+
+def trie_pattern(words) -> str:
+    """
+    Regex source matching any of `words`, factored as a trie
+    (e.g. ["i+d", "i+d+i"] -> "i\\+d(?:\\+i)?"): the engine follows one branch
+    per character instead of trying every keyword in turn, and greedy
+    optionals make the longest keyword win at a given position.
+    """
+    trie = build_trie(words)
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+# a keyword matches whole words only, with an optional plural
+# ("caso" -> "casos", "certificación" -> "certificaciones"); texts and
+# keywords are textnorm-normalized, so accents and "I + D" are already folded
+PLURAL = "(?:e?s)?"
+
+def _is_word(ch: str) -> bool:
+    # same class as the regex \w
+    return ch.isalnum() or ch == "_"
+
+def contained_words(trie: dict, text: str) -> set[str]:
+    """
+    Every word of `trie` occurring in `text` as KeywordMatcher matches it
+    (whole word, optional plural), overlaps and prefixes included: one
+    trie walk from each word start, so linear in len(text) × depth.
+    """
+    def ends_word(j):
+        return j >= len(text) or not _is_word(text[j])
+
+    found = set()
+    for i in range(len(text)):
+        if i and _is_word(text[i - 1]):
+            continue
+        node, j = trie, i
+        while True:
+            if "" in node and (ends_word(j) or (text[j:j + 1] == "s" and ends_word(j + 1))
+                               or (text[j:j + 2] == "es" and ends_word(j + 2))):
+                found.add(text[i:j])
+            if j >= len(text) or text[j] not in node:
+                break
+            node = node[text[j]]
+            j += 1
+    return found
+
+class KeywordMatcher:
+    """
+    Compiled once from {label: [keywords]}; match() returns every label with
+    at least one keyword in the text, in a single pass over it. Keywords
+    match on word boundaries (plural allowed, see PLURAL).
+
+    The combined pattern sits inside a lookahead so it is tried at every
+    word start, overlapping occurrences included. At a given position only
+    the longest keyword is reported, so a match also carries the labels of
+    the keywords the matched word contains, plural suffix included: "es"
+    matched in "ess" holds "es" but not "e" (memoized per keyword + suffix).
+    Keywords are used as given: normalize them like the texts beforehand.
+    """
+
+    def __init__(self, groups: dict[str, list[str]]):
+        self.labels = list(groups)
+        kw_labels = defaultdict(set)
+        for i, kws in enumerate(groups.values()):
+            for kw in kws:
+                if kw:
+                    kw_labels[kw].add(i)
+        self._kw_labels = kw_labels
+        self._trie = build_trie(kw_labels)
+        self._labels_of = {}
+        self.regex = re.compile(f"(?<!\\w)(?=({trie_pattern(kw_labels)})({PLURAL})(?!\\w))") if kw_labels else None
+
+    def _labels_of_match(self, kw: str, suffix: str) -> frozenset:
+        labels = self._labels_of.get((kw, suffix))
+        if labels is None:
+            # the matched word ends at a word boundary, so its contained words are exactly those
+            words = contained_words(self._trie, kw + suffix)
+            labels = self._labels_of[(kw, suffix)] = frozenset().union(*(self._kw_labels[w] for w in words))
+        return labels
+
+    def match(self, text: str) -> list[str]:
+        return [self.labels[i] for i in sorted(self.match_ids(text))]
+
+    def match_ids(self, text: str) -> set[int]:
+        # indices in self.labels of the labels found in text
+        if self.regex is None or not text:
+            return set()
+        found = set()
+        n = len(self.labels)
+        for m in self.regex.finditer(text):
+            found |= self._labels_of_match(m.group(1), m.group(2))
+            if len(found) == n:
+                break
+        return found
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import bisect
+import cProfile
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from contextlib import contextmanager
+
+ROOT = Path(__file__).resolve().parents[1]
+METRICS_PATH = ROOT / "reports" / "metrics.jsonl"
+PROFILE_DIR = ROOT / "reports" / "profile"
+# reports/ is committed every week: older runs are dropped from metrics.jsonl
+KEEP_RUNS = 26
+
+# histogram bucket upper bounds (seconds for latencies)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+# shared by the scripts of one workflow run when METRICS_RUN_ID is set
+RUN_ID = os.environ.get("METRICS_RUN_ID") or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+_lock = threading.Lock()
+_stages = []
+_counters = {}
+_histograms = {}
+_gauges = {}
+_profile = False
+_profiling = False
+_profiled = []
+_open_stages = []  # main-thread nesting, for stage paths like "analyze/classify"
+
+def _key(name: str, labels: dict) -> tuple:
+    # label values as strings: keys stay sortable (status=200 vs status="Timeout")
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+def enable_profiling(enabled: bool = True):
+    """
+    --profile: each stage() also runs under cProfile (main thread only) and
+    dumps reports/profile/<script>-<stage>.prof
+    """
+    global _profile
+    _profile = enabled
+
+def incr(name: str, n: float = 1, **labels):
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + n
+
+def gauge(name: str, value: float, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+def observe(name: str, value: float, **labels):
+    k = _key(name, labels)
+    with _lock:
+        h = _histograms.get(k)
+        if h is None:
+            h = _histograms[k] = {"count": 0, "sum": 0.0, "min": value, "max": value, "buckets": [0] * len(BUCKETS)}
+        h["count"] += 1
+        h["sum"] += value
+        h["min"] = min(h["min"], value)
+        h["max"] = max(h["max"], value)
+        h["buckets"][bisect.bisect_left(BUCKETS, value)] += 1
+
+def quantile(h: dict, q: float) -> float:
+    # upper bound of the bucket holding the q-th observation
+    rank = q * h["count"]
+    seen = 0
+    for bound, n in zip(BUCKETS, h["buckets"]):
+        seen += n
+        if seen >= rank:
+            return min(bound, h["max"])
+    return h["max"]
+
+@contextmanager
+def stage(name: str):
+    """
+    Wall time of a pipeline stage. Nested stages are reported separately
+    under their path ("analyze/classify"); with profiling on, only the
+    outermost stage of a nest is profiled.
+    """
+    global _profiling
+    _open_stages.append(name)
+    path = "/".join(_open_stages)
+    prof = None
+    if _profile and not _profiling:
+        prof = cProfile.Profile()
+        _profiling = True
+    t0 = time.perf_counter()
+    if prof is not None:
+        prof.enable()
+    try:
+        yield
+    finally:
+        if prof is not None:
+            prof.disable()
+            _profiling = False
+        seconds = time.perf_counter() - t0
+        _open_stages.pop()
+        with _lock:
+            _stages.append({"name": path, "seconds": round(seconds, 4)})
+        if prof is not None:
+            _profiled.append((path, prof))
+
+@contextmanager
+def timed(name: str, **labels):
+    """
+    Observes the duration of the block into histogram `name`.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "stages": list(_stages),
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {k: dict(v) for k, v in _histograms.items()},
+        }
+
+def rotate(path: Path, keep: int = KEEP_RUNS):
+    # keeps the lines of the last `keep` runs (in order of first appearance)
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    runs = {}
+    for line in lines:
+        try:
+            runs.setdefault(json.loads(line).get("run"), None)
+        except ValueError:
+            continue
+    if len(runs) <= keep:
+        return
+    kept = set(list(runs)[-keep:])
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for line in lines:
+            try:
+                if json.loads(line).get("run") in kept:
+                    f.write(line)
+            except ValueError:
+                continue
+    os.replace(tmp, path)
+
+def emit(script: str, path: Path | None = None):
+    """
+    Appends this process' measurements to reports/metrics.jsonl (one JSON
+    object per line, all tagged with run id and script; the last KEEP_RUNS
+    runs are kept), writes the profiles, then resets the collectors.
+    """
+    path = path or METRICS_PATH
+    snap = snapshot()
+    base = {"run": RUN_ID, "script": script, "ts": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+    lines = []
+    for st in snap["stages"]:
+        lines.append({**base, "type": "stage", **st})
+    for (name, labels), value in sorted(snap["counters"].items()):
+        lines.append({**base, "type": "counter", "name": name, "labels": dict(labels), "value": value})
+    for (name, labels), value in sorted(snap["gauges"].items()):
+        lines.append({**base, "type": "gauge", "name": name, "labels": dict(labels), "value": value})
+    for (name, labels), h in sorted(snap["histograms"].items()):
+        lines.append({
+            **base, "type": "histogram", "name": name, "labels": dict(labels),
+            "count": h["count"], "sum": round(h["sum"], 4),
+            "min": round(h["min"], 4), "max": round(h["max"], 4),
+            "p50": round(quantile(h, 0.5), 4), "p90": round(quantile(h, 0.9), 4), "p99": round(quantile(h, 0.99), 4),
+        })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    rotate(path)
+
+    if _profiled:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        for name, prof in _profiled:
+            prof.dump_stats(PROFILE_DIR / f"{script}-{name.replace('/', '.')}.prof")
+        print(f"[profile] {len(_profiled)} profiles written to {PROFILE_DIR}")
+
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+        _profiled.clear()
@@ -0,0 +1,163 @@
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from graphlib import TopologicalSorter
+
+import metrics
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_PATH = ROOT / "data" / "cache" / "pipeline_state.json"
+
+# The weekly run as a DAG. Inputs/outputs are files (data, config and the
+# step's own code); a step whose inputs and outputs all hash to what its last
+# successful run recorded is skipped. fingerprint=False: always runs
+# (network, side effects).
+STEPS = {
+    "fetch": {
+        "needs": [],
+        "fingerprint": False,
+        "inputs": ["config/sources.yaml"],
+        "outputs": ["data/posts.csv"],
+    },
+    "analyze": {
+        "needs": ["fetch"],
+        "fingerprint": True,
+        "inputs": ["data/posts.csv", "config/keywords.yaml",
+                   "src/analyze.py", "src/keyword_matcher.py", "src/analysis_cache.py", "src/textnorm.py"],
+        "outputs": ["reports/report.md", "reports/brief.json"],
+    },
+    "weekly_posts": {
+        "needs": ["analyze"],
+        "fingerprint": True,
+        "inputs": ["reports/brief.json", "src/weekly_posts.py"],
+        "outputs": ["reports/weekly_posts.md"],
+    },
+    "email": {
+        "needs": ["weekly_posts"],
+        "fingerprint": False,
+        "inputs": ["reports/weekly_posts.md"],
+        "outputs": [],
+    },
+}
+
+def run_fetch(ctx: dict, args):
+    import fetch_sources
+    ctx["new_rows"] = fetch_sources.crawl(resume=args.resume)
+
+def run_analyze(ctx: dict, args):
+    import analyze
+    ctx.update(analyze.run(use_cache=not args.no_cache, chunksize=analyze.CHUNKSIZE if args.stream else None))
+
+def run_weekly_posts(ctx: dict, args):
+    import weekly_posts
+    weekly_posts.run(brief=ctx.get("brief"))
+
+def run_email(ctx: dict, args):
+    import send_email_graph
+    send_email_graph.run()
+
+RUNNERS = {
+    "fetch": run_fetch,
+    "analyze": run_analyze,
+    "weekly_posts": run_weekly_posts,
+    "email": run_email,
+}
+
+def file_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(paths: list[str]) -> dict:
+    return {p: file_hash(ROOT / p) for p in paths}
+
+def load_state() -> dict:
+    if STATE_PATH.exists():
+        try:
+            return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+        except ValueError:
+            pass
+    return {}
+
+def save_state(state: dict):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def up_to_date(name: str, state: dict) -> bool:
+    step = STEPS[name]
+    last = state.get(name)
+    if not step["fingerprint"] or not last:
+        return False
+    outputs = fingerprint(step["outputs"])
+    if None in outputs.values():
+        return False
+    return last.get("inputs") == fingerprint(step["inputs"]) and last.get("outputs") == outputs
+
+def order() -> list[str]:
+    return list(TopologicalSorter({n: s["needs"] for n, s in STEPS.items()}).static_order())
+
+def run(skip: set | None = None, force: bool = False, args=None) -> dict:
+    """
+    Runs the steps in dependency order in this process; `ctx` carries what
+    a step already has in memory (the classified posts, the brief) to the
+    next ones. A failed step stops its dependents, its state is not
+    recorded. Returns step -> "ran" | "unchanged" | "skipped" | "failed" | "blocked".
+    """
+    skip = skip or set()
+    state = load_state()
+    ctx = {}
+    results = {}
+    errors = []
+    for name in order():
+        step = STEPS[name]
+        if any(results[n] in ("failed", "blocked") for n in step["needs"]):
+            results[name] = "blocked"
+        elif name in skip:
+            results[name] = "skipped"
+        elif not force and up_to_date(name, state):
+            results[name] = "unchanged"
+            print(f"[pipeline] {name}: inputs unchanged since the last run, skipped")
+        else:
+            print(f"[pipeline] {name}")
+            inputs = fingerprint(step["inputs"])
+            try:
+                with metrics.stage(name):
+                    RUNNERS[name](ctx, args)
+            except Exception as e:
+                results[name] = "failed"
+                errors.append(e)
+                print(f"[warn] Step {name} failed: {e}")
+            else:
+                results[name] = "ran"
+                state[name] = {"inputs": inputs, "outputs": fingerprint(step["outputs"])}
+                save_state(state)
+        metrics.incr("pipeline.steps", step=name, result=results[name])
+    print(f"OK — Pipeline: {results}")
+    if errors:
+        raise errors[0]
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Weekly run: fetch -> analyze -> weekly_posts -> email, in one process")
+    parser.add_argument("--skip", action="append", default=[], choices=list(STEPS),
+                        help="do not run this step (repeatable); its dependents still run")
+    parser.add_argument("--force", action="store_true", help="run every step even if its inputs are unchanged")
+    parser.add_argument("--resume", action="store_true", help="fetch: continue the interrupted crawl")
+    parser.add_argument("--no-cache", action="store_true", help="analyze: ignore data/cache/analysis.sqlite")
+    parser.add_argument("--stream", action="store_true", help="analyze: read posts.csv in chunks (bounded memory)")
+    parser.add_argument("--profile", action="store_true", help="cProfile each step into reports/profile/")
+    args = parser.parse_args(argv)
+
+    metrics.enable_profiling(args.profile)
+    try:
+        run(skip=set(args.skip), force=args.force, args=args)
+    finally:
+        metrics.emit("pipeline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+# per-source crawl frequency (sources.yaml `schedule:`); no schedule = every run.
+# Only checked when a run happens: never more often than the workflow's cron.
+SCHEDULES = {"daily": timedelta(days=1), "weekly": timedelta(days=7)}
+# a run slightly earlier than the interval (cron jitter, a long previous run) still counts
+SCHEDULE_SLACK = timedelta(hours=6)
+
+class BudgetExceeded(Exception):
+    pass
+
+def base_url_of(src: dict) -> str:
+    # explicit base_url, else scheme://host of the source URL
+    if src.get("base_url"):
+        return src["base_url"]
+    parts = urlsplit(src["url"])
+    return f"{parts.scheme}://{parts.netloc}"
+
+def priority_of(src: dict) -> int:
+    return int(src.get("priority", 0))
+
+def by_priority(sources: list[dict]) -> list[dict]:
+    # highest priority first, config order among equals
+    return sorted(sources, key=lambda s: -priority_of(s))
+
+def schedule_error(src: dict) -> str | None:
+    schedule = src.get("schedule")
+    if schedule is not None and schedule not in SCHEDULES:
+        return f"unknown schedule {schedule!r} (expected {', '.join(SCHEDULES)})"
+    return None
+
+def is_due(src: dict, last_crawl: datetime | None, now: datetime) -> bool:
+    # src already checked by schedule_error
+    schedule = src.get("schedule")
+    if schedule is None or last_crawl is None:
+        return True
+    return now - last_crawl >= SCHEDULES[schedule] - SCHEDULE_SLACK
+
+class SourceBudget:
+    """
+    Limits of one source for this run (sources.yaml, all optional):
+    - max_urls: new article URLs queued; the rest waits for the next run
+    - max_time: seconds from the start of the run after which its
+      articles are no longer fetched (discovery included in the count)
+    - max_concurrency: its articles in flight at once, whatever the hosts
+    """
+
+    def __init__(self, src: dict | None = None):
+        src = src or {}
+        self.max_urls = int(src["max_urls"]) if src.get("max_urls") is not None else None
+        max_time = src.get("max_time")
+        self.deadline = time.monotonic() + float(max_time) if max_time is not None else None
+        concurrency = src.get("max_concurrency")
+        self.max_concurrency = max(1, int(concurrency)) if concurrency else None
+
+    def cap(self, urls: list[str]) -> list[str]:
+        return urls if self.max_urls is None else urls[:self.max_urls]
+
+    def check(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded("max_time reached")
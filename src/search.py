@@ -0,0 +1,251 @@
+import io
+import re
+import csv
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import argparse
+from pathlib import Path
+
+import textnorm
+
+ROOT = Path(__file__).resolve().parents[1]
+POSTS_PATH = ROOT / "data" / "posts.csv"
+INDEX_PATH = ROOT / "data" / "cache" / "search.sqlite"
+
+# rank = BM25 relevance + ENGAGEMENT_WEIGHT × log1p(engagement_score)
+ENGAGEMENT_WEIGHT = 0.5
+SNIPPET_CHARS = 160
+# bytes before the indexed offset that must not change for an incremental sync
+TAIL_BYTES = 4096
+# bumped whenever stem() changes: the index is then rebuilt
+STEM_VERSION = 2
+
+def stem(word: str) -> str:
+    """
+    Light Spanish stemmer on folded words: the trailing plural and gender
+    letters (s, e, a, o) are dropped, keeping at least 3 characters, and a
+    final z is spelled c (voz/voces). A plural being its singular + s/es,
+    both always get the same stem: informes/informe -> inform,
+    motivados/motivada -> motivad, deducciones/deducción -> deduccion,
+    paises/país -> pai.
+    """
+    if word.endswith("z"):
+        word = word[:-1] + "c"
+    return word[:max(3, len(word.rstrip("aeos")))]
+
+def terms(text: str) -> list[str]:
+    return [stem(w) for w in textnorm.tokens(text)]
+
+def engagement_score(row: dict) -> int:
+    # same formula as the engagement_score of analyze.derive_features
+    def num(key):
+        try:
+            return int(float(row.get(key) or 0))
+        except ValueError:
+            return 0
+    return num("likes") + 2 * num("comments") + 3 * num("reposts")
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or INDEX_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.create_function("log1p", 1, math.log1p, deterministic=True)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS posts (
+            id INTEGER PRIMARY KEY,
+            competitor TEXT,
+            platform TEXT,
+            date TEXT,
+            url TEXT,
+            engagement INTEGER,
+            content TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS posts_filters ON posts (competitor, platform, date)")
+    # contentless: only the stemmed terms are indexed, the text lives in posts
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(terms, content='')")
+    return conn
+
+def _meta(conn: sqlite3.Connection) -> dict:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'sync'").fetchone()
+    return json.loads(row[0]) if row else {}
+
+def _tail_hash(f, offset: int) -> str:
+    start = max(0, offset - TAIL_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+def _clear(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM posts")
+    conn.execute("DROP TABLE posts_fts")
+    conn.execute("CREATE VIRTUAL TABLE posts_fts USING fts5(terms, content='')")
+    conn.execute("DELETE FROM meta WHERE key = 'sync'")
+
+def sync(posts_path: Path | None = None, conn: sqlite3.Connection | None = None) -> int:
+    """
+    Indexes the rows appended to posts.csv since the last sync, from the
+    byte offset where it stopped. A rewritten file (--reextract, hand edits
+    before the offset) is detected and re-indexed from scratch.
+    Returns the number of rows indexed.
+    """
+    posts_path = posts_path or POSTS_PATH
+    own = conn is None
+    conn = conn or connect()
+    try:
+        if not posts_path.exists():
+            return 0
+        state = _meta(conn)
+        with open(posts_path, "rb") as f:
+            size = f.seek(0, 2)
+            offset = state.get("offset", 0)
+            if offset and state.get("stem") != STEM_VERSION:
+                print("[search] stemming rule changed: rebuilding the index")
+                _clear(conn)
+                state, offset = {}, 0
+            elif offset and (size < offset or _tail_hash(f, offset) != state.get("tail")):
+                print("[search] posts.csv was rewritten: rebuilding the index")
+                _clear(conn)
+                state, offset = {}, 0
+            if size == offset:
+                return 0
+
+            f.seek(offset)
+            text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+            if offset == 0:
+                reader = csv.DictReader(text)
+            else:
+                reader = csv.DictReader(text, fieldnames=state["header"])
+            next_id = state.get("rows", 0)
+            posts, fts = [], []
+            for row in reader:
+                next_id += 1
+                content = row.get("content") or ""
+                posts.append((next_id, row.get("competitor") or "", row.get("platform") or "",
+                               (row.get("date") or "")[:10], row.get("url") or "", engagement_score(row), content))
+                fts.append((next_id, " ".join(terms(content))))
+            header = reader.fieldnames or state.get("header")
+            text.detach()
+
+            conn.executemany("INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?)", posts)
+            conn.executemany("INSERT INTO posts_fts (rowid, terms) VALUES (?, ?)", fts)
+            state = {"offset": size, "tail": _tail_hash(f, size), "rows": next_id, "header": header, "stem": STEM_VERSION}
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('sync', ?)", (json.dumps(state),))
+        conn.commit()
+        return len(posts)
+    finally:
+        if own:
+            conn.close()
+
+def quarter_range(quarter: str) -> tuple[str, str]:
+    # "2026Q1" / "2026-Q1" -> ("2026-01-01", "2026-03-31")
+    m = re.fullmatch(r"(\d{4})-?[Qq]([1-4])", quarter.strip())
+    if not m:
+        raise ValueError(f"Invalid quarter: {quarter} (expected e.g. 2026Q1)")
+    year, q = int(m.group(1)), int(m.group(2))
+    last_day = {1: "03-31", 2: "06-30", 3: "09-30", 4: "12-31"}[q]
+    return f"{year}-{3 * q - 2:02d}-01", f"{year}-{last_day}"
+
+def search(query: str, competitor: str | None = None, platform: str | None = None,
+           since: str | None = None, until: str | None = None, limit: int = 10,
+           any_term: bool = False, conn: sqlite3.Connection | None = None) -> list[dict]:
+    """
+    Posts matching every query term (any_term: at least one), filtered,
+    best first. Dates are "YYYY-MM-DD"; undated posts never match a date filter.
+    """
+    words = list(dict.fromkeys(terms(query)))
+    if not words:
+        return []
+    match = (" OR " if any_term else " ").join('"' + w + '"' for w in words)
+    sql = [
+        "SELECT p.id, p.competitor, p.platform, p.date, p.url, p.engagement, p.content,",
+        "       -bm25(posts_fts) + ? * log1p(p.engagement) AS score",
+        "FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid",
+        "WHERE posts_fts MATCH ?",
+    ]
+    params = [ENGAGEMENT_WEIGHT, match]
+    if competitor:
+        sql.append("AND p.competitor = ? COLLATE NOCASE")
+        params.append(competitor)
+    if platform:
+        sql.append("AND p.platform = ? COLLATE NOCASE")
+        params.append(platform)
+    if since:
+        sql.append("AND p.date != '' AND p.date >= ?")
+        params.append(since)
+    if until:
+        sql.append("AND p.date != '' AND p.date <= ?")
+        params.append(until)
+    sql.append("ORDER BY score DESC LIMIT ?")
+    params.append(limit)
+
+    own = conn is None
+    conn = conn or connect()
+    try:
+        rows = conn.execute("\n".join(sql), params).fetchall()
+    finally:
+        if own:
+            conn.close()
+    wanted = set(words)
+    return [{
+        "row": r[0], "competitor": r[1], "platform": r[2], "date": r[3], "url": r[4],
+        "engagement_score": r[5], "score": round(r[7], 3), "snippet": snippet(r[6], wanted),
+    } for r in rows]
+
+def snippet(content: str, wanted: set, width: int = SNIPPET_CHARS) -> str:
+    # window around the first matching word
+    start = 0
+    for m in textnorm.WORD_RE.finditer(content):
+        if stem(textnorm.fold(m.group())) in wanted:
+            start = max(0, m.start() - width // 3)
+            break
+    text = content[start:start + width].replace("\n", " ")
+    return ("…" if start else "") + text.strip()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Full-text search over data/posts.csv")
+    parser.add_argument("query", nargs="?", default="", help='e.g. "informe motivado"')
+    parser.add_argument("--competitor")
+    parser.add_argument("--platform")
+    parser.add_argument("--since", help="YYYY-MM-DD")
+    parser.add_argument("--until", help="YYYY-MM-DD")
+    parser.add_argument("--quarter", help="e.g. 2026Q1 (sets --since/--until)")
+    parser.add_argument("--any", action="store_true", help="match any term instead of all")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--rebuild", action="store_true", help="re-index posts.csv from scratch")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.quarter:
+        args.since, args.until = quarter_range(args.quarter)
+
+    conn = connect()
+    try:
+        if args.rebuild:
+            _clear(conn)
+        n = sync(conn=conn)
+        if n:
+            print(f"[search] {n} new posts indexed")
+        if not args.query:
+            return
+        t0 = time.perf_counter()
+        results = search(args.query, args.competitor, args.platform, args.since, args.until,
+                         args.limit, args.any, conn=conn)
+        ms = (time.perf_counter() - t0) * 1000
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    for i, r in enumerate(results, start=1):
+        print(f"{i:>2}. [{r['score']:.2f}] {r['date'] or '----------'} {r['competitor']} / {r['platform']}"
+              f" (engagement {r['engagement_score']}) {r['url']}")
+        print(f"    {r['snippet']}")
+    print(f"OK — {len(results)} results in {ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
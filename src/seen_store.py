@@ -0,0 +1,139 @@
+import os
+import json
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+ROOT = Path(__file__).resolve().parents[1]
+LOG_PATH = ROOT / "data" / "seen_urls.jsonl"
+LEGACY_PATH = ROOT / "data" / "seen_urls.json"
+
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok",
+}
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+def canonical_url(url: str) -> str:
+    """
+    Canonical form used as the seen key:
+    - lowercase scheme and host, default port dropped
+    - fragment and tracking params (utm_*, gclid, fbclid...) removed, remaining params sorted
+    - trailing slash removed (except for the root path)
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+class SeenStore:
+    """
+    Append-only log of seen URLs (one JSON record per line).
+    Every add() is written through immediately, so a crash loses nothing;
+    a later line for the same URL updates the earlier one. The log is
+    compacted on close() once superseded lines dominate.
+
+    Record: {"url", "first_seen", "last_seen", "status", "content_hash"}
+    """
+
+    def __init__(self, path: Path = LOG_PATH, legacy_path: Path | None = LEGACY_PATH):
+        self.path = path
+        self.records = {}
+        self._lines = 0
+        self._lock = threading.Lock()
+        self._fh = None
+        self._load()
+        if not self.path.exists() and legacy_path is not None and legacy_path.exists():
+            self._import_legacy(legacy_path)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                key = rec.get("url")
+                if key:
+                    self.records.setdefault(key, {}).update(rec)
+                    self._lines += 1
+
+    def _import_legacy(self, legacy_path: Path):
+        for u in json.loads(legacy_path.read_text(encoding="utf-8")):
+            self.add(u, status="legacy", first_seen="")
+        self.flush()
+
+    def _write(self, rec: dict):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self._lines += 1
+
+    def __contains__(self, url: str) -> bool:
+        return canonical_url(url) in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, url: str) -> dict | None:
+        return self.records.get(canonical_url(url))
+
+    def add(self, url: str, status: str = "ok", content_hash: str | None = None, **extra) -> dict:
+        key = canonical_url(url)
+        today = _today()
+        with self._lock:
+            rec = dict(self.records.get(key) or {"url": key, "first_seen": today})
+            rec.update(extra)
+            rec["last_seen"] = today
+            rec["status"] = status
+            if content_hash is not None:
+                rec["content_hash"] = content_hash
+            self.records[key] = rec
+            self._write(rec)
+            return rec
+
+    def flush(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+
+    def compact(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for rec in self.records.values():
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self._lines = len(self.records)
+
+    def close(self):
+        if self._lines > max(1000, 2 * len(self.records)):
+            self.compact()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
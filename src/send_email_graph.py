@@ -1,10 +1,13 @@
 import os
 import json
+import argparse
 import urllib.request
 import urllib.parse
 from pathlib import Path
 from datetime import datetime
 
+import metrics
+
 ROOT = Path(__file__).resolve().parents[1]
 REPORT = ROOT / "reports" / "weekly_posts.md"
 
@@ -57,7 +60,18 @@ def send_mail(token: str, mail_from: str, mail_to: str, subject: str, body: str)
     with urllib.request.urlopen(request) as response:
         response.read()
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send reports/weekly_posts.md through Microsoft Graph")
+    parser.add_argument("--profile", action="store_true", help="cProfile each stage into reports/profile/")
+    args = parser.parse_args(argv)
+
+    metrics.enable_profiling(args.profile)
+    try:
+        run()
+    finally:
+        metrics.emit("send_email_graph")
+
+def run():
     if not REPORT.exists():
         raise FileNotFoundError("reports/weekly_posts.md not found")
 
@@ -85,8 +99,11 @@ def main():
 
     body = prompt + content
 
-    token = get_token(tenant_id, client_id, client_secret)
-    send_mail(token, mail_from, mail_to, subject, body)
+    with metrics.stage("token"):
+        token = get_token(tenant_id, client_id, client_secret)
+    with metrics.stage("send"):
+        send_mail(token, mail_from, mail_to, subject, body)
+    metrics.gauge("email.bytes", len(body.encode("utf-8")))
 
     print("OK — Email sent via Microsoft Graph")
 
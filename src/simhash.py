@@ -0,0 +1,107 @@
+import re
+import csv
+import json
+import hashlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_PATH = ROOT / "data" / "fingerprints.jsonl"
+POSTS_PATH = ROOT / "data" / "posts.csv"
+
+BITS = 64
+BANDS = 8  # 8 × 8 bits: two fingerprints within MAX_DISTANCE (< BANDS) share at least one band
+MAX_DISTANCE = 6  # unrelated texts sit ~32 bits apart
+SHINGLE = 3
+
+TOKEN_RE = re.compile(r"\w+")
+
+def tokens(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower()) if isinstance(text, str) else []
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word 3-shingles: near-identical texts (AMP copies,
+    republished articles, boilerplate changes) get fingerprints a few bits apart.
+    """
+    toks = tokens(text)
+    if len(toks) < SHINGLE:
+        grams = [" ".join(toks)] if toks else []
+    else:
+        grams = [" ".join(toks[i:i + SHINGLE]) for i in range(len(toks) - SHINGLE + 1)]
+    weights = [0] * BITS
+    for g in grams:
+        h = int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big")
+        for b in range(BITS):
+            weights[b] += 1 if (h >> b) & 1 else -1
+    fp = 0
+    for b in range(BITS):
+        if weights[b] > 0:
+            fp |= 1 << b
+    return fp
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+def _bands(fp: int) -> list[tuple[int, int]]:
+    width = BITS // BANDS
+    mask = (1 << width) - 1
+    return [(i, (fp >> (i * width)) & mask) for i in range(BANDS)]
+
+class FingerprintIndex:
+    """
+    Persistent SimHash index (append-only JSONL: {"url", "simhash"}).
+    Lookups only compare against fingerprints sharing a band, so
+    they stay fast as the corpus grows.
+    """
+
+    def __init__(self, path: Path = INDEX_PATH, max_distance: int = MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self.buckets = {}
+        self.urls = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._insert(int(rec["simhash"], 16), rec["url"])
+        else:
+            self._seed_from_posts()
+
+    def _insert(self, fp: int, url: str):
+        self.urls.setdefault(fp, url)
+        for band in _bands(fp):
+            self.buckets.setdefault(band, []).append(fp)
+
+    def _seed_from_posts(self):
+        # first run: fingerprint what is already in posts.csv
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch()
+        if not POSTS_PATH.exists():
+            return
+        with open(POSTS_PATH, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                if row.get("content"):
+                    self.add(row.get("url") or "", simhash(row["content"]))
+
+    def find(self, fp: int) -> str | None:
+        """
+        URL of an indexed post within max_distance bits of fp, if any.
+        """
+        best, best_d = None, self.max_distance + 1
+        for band in _bands(fp):
+            for other in self.buckets.get(band, ()):
+                d = hamming(fp, other)
+                if d < best_d:
+                    best, best_d = other, d
+        return self.urls[best] if best is not None else None
+
+    def add(self, url: str, fp: int):
+        self._insert(fp, url)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"url": url, "simhash": f"{fp:016x}"}, ensure_ascii=False) + "\n")
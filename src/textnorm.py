@@ -0,0 +1,34 @@
+import re
+import unicodedata
+
+# The one normalization of post texts and keywords, applied at ingest
+# (posts.csv content_norm column) and to keywords.yaml. A change here
+# means re-normalizing the stored column (delete it: load_posts refills it).
+
+_COMBINING_RE = re.compile("[\u0300-\u036f]")
+_PLUS_RE = re.compile(r"\s*\+\s*")
+# everything but letters, digits, "+" and "/" ("i+d", "ley 27/2014") is a separator
+_PUNCT_RE = re.compile(r"[^\w\s+/]|_")
+_SPACE_RE = re.compile(r"\s+")
+WORD_RE = re.compile(r"\w+")
+
+def fold(text: str) -> str:
+    """
+    Lowercase without accents: NFKD, then the combining marks are dropped
+    ("Guía" -> "guia", "Deducción" -> "deduccion", "ñ" -> "n").
+    """
+    if not isinstance(text, str):
+        return ""
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFKD", text)).lower()
+
+def normalize(text: str) -> str:
+    """
+    fold() + punctuation handling: "I + D" -> "i+d", other punctuation
+    becomes a space, whitespace collapsed.
+    """
+    text = _PLUS_RE.sub("+", fold(text))
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+def tokens(text: str) -> list[str]:
+    return WORD_RE.findall(fold(text))
@@ -1,7 +1,10 @@
 from pathlib import Path
 import json
+import argparse
 from datetime import datetime
 
+import metrics
+
 ROOT = Path(__file__).resolve().parents[1]
 BRIEF_PATH = ROOT / "reports" / "brief.json"
 OUT_PATH = ROOT / "reports" / "weekly_posts.md"
@@ -72,13 +75,30 @@ def render_markdown(posts: list[dict], generated_at: str) -> str:
         lines.append("")
     return "\n".join(lines)
 
-def main():
-    if not BRIEF_PATH.exists():
-        raise FileNotFoundError("reports/brief.json not found. Run analyze.py first.")
-    brief = json.loads(BRIEF_PATH.read_text(encoding="utf-8"))
-    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
-    posts = pick_two_posts(brief)
-    OUT_PATH.write_text(render_markdown(posts, generated_at), encoding="utf-8")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Draft the two weekly posts from reports/brief.json")
+    parser.add_argument("--profile", action="store_true", help="cProfile each stage into reports/profile/")
+    args = parser.parse_args(argv)
+
+    metrics.enable_profiling(args.profile)
+    try:
+        run()
+    finally:
+        metrics.emit("weekly_posts")
+
+def run(brief: dict | None = None):
+    """
+    brief: the analyze.py output when it is already in memory; read from
+    reports/brief.json otherwise.
+    """
+    if brief is None:
+        if not BRIEF_PATH.exists():
+            raise FileNotFoundError("reports/brief.json not found. Run analyze.py first.")
+        brief = json.loads(BRIEF_PATH.read_text(encoding="utf-8"))
+    with metrics.stage("render"):
+        generated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        posts = pick_two_posts(brief)
+        OUT_PATH.write_text(render_markdown(posts, generated_at), encoding="utf-8")
     print(f"OK — Weekly posts generated: {OUT_PATH}")
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+import os
+import json
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+ROOT = Path(__file__).resolve().parents[1]
+QUEUE_PATH = ROOT / "data" / "cache" / "crawl_queue.jsonl"
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+LOW_CONTENT = "low_content"
+DUPLICATE = "duplicate"
+FINAL_STATES = {DONE, FAILED, LOW_CONTENT, DUPLICATE}
+
+class WorkQueue:
+    """
+    Durable crawl queue: an append-only JSONL log of state transitions
+    ({"url", "source", "state", ...}), the last line for a URL wins.
+    The first line records the run start. URLs left pending or in flight
+    by an interrupted run are picked up again by --resume.
+    """
+
+    def __init__(self, path: Path = QUEUE_PATH):
+        self.path = path
+        self.items = {}
+        self.run_started = None
+        self._lock = threading.Lock()
+        self._fh = None
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    if "run_started" in rec:
+                        self.run_started = rec["run_started"]
+                    elif rec.get("url"):
+                        self.items.setdefault(rec["url"], {}).update(rec)
+
+    def _write(self, rec: dict):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def reset(self, run_started: str):
+        with self._lock:
+            self.close()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+            self.items = {}
+            self.run_started = run_started
+            self._write({"run_started": run_started})
+        self.flush()
+
+    def enqueue(self, url: str, source: str):
+        with self._lock:
+            if url in self.items:
+                return
+            rec = {"url": url, "source": source, "state": PENDING}
+            self.items[url] = rec
+            self._write(rec)
+
+    def mark(self, url: str, state: str, **extra):
+        with self._lock:
+            rec = self.items.setdefault(url, {"url": url})
+            rec.update(extra)
+            rec["state"] = state
+            rec["ts"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            self._write({"url": url, "state": state, **extra, "ts": rec["ts"]})
+
+    def source_of(self, url: str) -> str:
+        return self.items.get(url, {}).get("source", "")
+
+    def unfinished(self) -> list[str]:
+        return [u for u, rec in self.items.items() if rec.get("state") not in FINAL_STATES]
+
+    def counts(self) -> dict:
+        out = {}
+        for rec in self.items.values():
+            out[rec.get("state")] = out.get(rec.get("state"), 0) + 1
+        return out
+
+    def flush(self):
+        # checkpoint: make every transition so far durable
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
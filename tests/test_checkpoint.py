@@ -0,0 +1,58 @@
+import csv
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+from fake_site import FakeSite
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# kill the crawler right after its first batch reached posts.csv, before
+# the batch is marked seen / done
+CRASH = """
+import os, sys
+sys.path.insert(0, sys.argv[1])
+import fetch_sources
+append = fetch_sources.append_posts
+def append_then_die(rows):
+    append(rows)
+    os._exit(1)
+fetch_sources.append_posts = append_then_die
+fetch_sources.main([])
+"""
+
+def posts_urls(root):
+    with open(root / "data" / "posts.csv", "r", encoding="utf-8", newline="") as f:
+        return [row["url"] for row in csv.DictReader(f)]
+
+def test_resume_after_crash_between_append_and_seen(tmp_path):
+    site = FakeSite(articles=30)
+    server = site.start()
+    try:
+        shutil.copytree(ROOT / "src", tmp_path / "src", ignore=shutil.ignore_patterns("__pycache__"))
+        (tmp_path / "config").mkdir()
+        (tmp_path / "data").mkdir()
+        cfg = {
+            "crawl": {"host_delay": 0.0, "host_concurrency": 4, "max_retries": 0},
+            "sources": [{
+                "name": "Fake", "url": site.base_url + "/es/novedades/",
+                "include_url_regex": "^" + re.escape(site.base_url) + "/es/novedades/post-",
+            }],
+        }
+        (tmp_path / "config" / "sources.yaml").write_text(yaml.safe_dump(cfg), encoding="utf-8")
+
+        crashed = subprocess.run([sys.executable, "-c", CRASH, str(tmp_path / "src")], capture_output=True, text=True)
+        assert crashed.returncode == 1, crashed.stderr
+        assert len(posts_urls(tmp_path)) == 20  # one CHECKPOINT_EVERY batch
+
+        resumed = subprocess.run([sys.executable, str(tmp_path / "src" / "fetch_sources.py"), "--resume"],
+                                 capture_output=True, text=True)
+        assert resumed.returncode == 0, resumed.stderr
+    finally:
+        server.shutdown()
+    urls = posts_urls(tmp_path)
+    assert len(urls) == len(set(urls)) == 30
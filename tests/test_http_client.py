@@ -0,0 +1,40 @@
+import pytest
+
+import http_client
+from fake_site import FakeSite
+
+BAD = {"/es/novedades/post-3/", "/es/novedades/post-4/"}
+
+class FlakySite(FakeSite):
+    # BAD articles always answer 503
+    def route(self, path, query):
+        if path in BAD:
+            return 503, "text/plain", b"unavailable"
+        return super().route(path, query)
+
+@pytest.fixture
+def site(monkeypatch):
+    monkeypatch.setattr(http_client, "GATE", http_client.HostGate(delay=0.0))
+    monkeypatch.setattr(http_client, "BREAKER", http_client.CircuitBreaker(threshold=http_client.BREAKER_THRESHOLD))
+    monkeypatch.setattr(http_client, "MAX_RETRIES", 3)
+    monkeypatch.setattr(http_client, "BACKOFF_BASE", 0.0)
+    s = FlakySite(articles=20)
+    server = s.start()
+    yield s
+    server.shutdown()
+
+def test_bad_urls_do_not_block_healthy_urls_of_their_host(site):
+    # 2 URLs × 4 attempts used to count 8 failures against a threshold of 5
+    for path in sorted(BAD):
+        assert http_client.get(site.base_url + path).status_code == 503
+    host = http_client.host_of(site.base_url)
+    assert not http_client.BREAKER.is_open(host)
+    for i in range(5, 10):
+        assert http_client.get(f"{site.base_url}/es/novedades/post-{i}/").status_code == 200
+
+def test_breaker_opens_after_threshold_failed_urls(site, monkeypatch):
+    monkeypatch.setattr(http_client, "BREAKER", http_client.CircuitBreaker(threshold=2))
+    for path in sorted(BAD):
+        http_client.get(site.base_url + path)
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get(site.base_url + "/es/novedades/post-5/")
@@ -0,0 +1,27 @@
+import random
+import re
+
+from keyword_matcher import KeywordMatcher
+
+def reference(groups, text):
+    # one whole-word regex per keyword, optional plural
+    return [label for label, kws in groups.items()
+            if any(re.search(rf"(?<!\w){re.escape(kw)}(?:e?s)?(?!\w)", text) for kw in kws if kw)]
+
+def test_plural_of_a_keyword_that_is_another_keyword_plus_s():
+    groups = {"mes": ["mes"], "mess": ["mess"]}
+    m = KeywordMatcher(groups)
+    for text in ["messes", "mess", "mes", "meses", "los messes del mes"]:
+        assert m.match(text) == reference(groups, text), text
+
+def test_matches_reference_on_random_keywords():
+    rng = random.Random(0)
+    for _ in range(1000):
+        kws = {"".join(rng.choice("ase") for _ in range(rng.randint(1, 4))) for _ in range(6)}
+        kws |= {kw + "s" for kw in sorted(kws)[:2]}
+        kws |= {kw + " " + rng.choice(sorted(kws)) for kw in sorted(kws)[:2]}
+        groups = {f"L{i}": [kw] for i, kw in enumerate(sorted(kws))}
+        m = KeywordMatcher(groups)
+        for _ in range(20):
+            text = "".join(rng.choice("ase +") for _ in range(rng.randint(1, 14))).strip()
+            assert m.match(text) == reference(groups, text), (text, groups)
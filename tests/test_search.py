@@ -0,0 +1,31 @@
+import csv
+
+import search
+
+PAIRS = [
+    ("país", "países"), ("interés", "intereses"), ("mes", "meses"), ("clase", "clases"),
+    ("deducción", "deducciones"), ("informe", "informes"), ("motivada", "motivados"),
+    ("voz", "voces"), ("café", "cafés"), ("menú", "menús"), ("ley", "leyes"),
+]
+
+def test_accented_singular_and_plural_share_a_stem():
+    for singular, plural in PAIRS:
+        assert search.terms(singular) == search.terms(plural), (singular, plural)
+
+def test_search_finds_the_other_number(tmp_path):
+    posts = tmp_path / "posts.csv"
+    with open(posts, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["platform", "competitor", "date", "url", "content"])
+        w.writeheader()
+        w.writerow({"platform": "web", "competitor": "A", "date": "2026-01-10", "url": "u1",
+                    "content": "Deducciones por I+D en otros países"})
+        w.writerow({"platform": "web", "competitor": "B", "date": "2026-02-10", "url": "u2",
+                    "content": "Un interés nuevo en el país"})
+    conn = search.connect(tmp_path / "search.sqlite")
+    try:
+        assert search.sync(posts, conn) == 2
+        assert {r["competitor"] for r in search.search("país", conn=conn)} == {"A", "B"}
+        assert [r["competitor"] for r in search.search("intereses", conn=conn)] == ["B"]
+        assert [r["competitor"] for r in search.search("deducción", conn=conn)] == ["A"]
+    finally:
+        conn.close()